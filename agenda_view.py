@@ -10,12 +10,37 @@ Author: Claude
 
 from datetime import datetime, date, timedelta
 from typing import List, Dict, Optional, Any, Tuple
-from collections import defaultdict, OrderedDict
+from collections import Counter, defaultdict
 from calendar import monthrange
 import calendar
 
 from task_manager import Task, TaskStatus, TaskPriority
 
+# Day and month names looked up by index instead of re-running strftime per day
+_WEEKDAY_NAMES = list(calendar.day_name)
+_MONTH_ABBR = list(calendar.month_abbr)
+
+# Membership sets shared by the agenda filters
+_IMPORTANT_PRIORITIES = frozenset({TaskPriority.HIGH, TaskPriority.URGENT})
+_CLOSED_STATUSES = frozenset({TaskStatus.DONE, TaskStatus.CANCELLED})
+
+
+def _format_short_date(d: date) -> str:
+    """Format a date like strftime('%b %d')."""
+    return f"{_MONTH_ABBR[d.month]} {d.day:02d}"
+
+
+def _sort_by_keys(tasks: List[Task], keys: List[Any]) -> List[Task]:
+    """
+    Sort tasks by keys computed up front (decorate-sort-undecorate).
+    
+    The keys come from a list comprehension rather than a per-item Python
+    key function, and the sort itself only calls the C-level list lookup.
+    Ties keep their input order, as with sorted().
+    """
+    order = sorted(range(len(tasks)), key=keys.__getitem__)
+    return [tasks[i] for i in order]
+
 
 class AgendaView:
     """
@@ -59,7 +84,7 @@ class AgendaView:
     
     def _get_daily_view(self, tasks: List[Task], target_date: date) -> Dict[str, List[Task]]:
         """Get agenda view for a single day."""
-        agenda = OrderedDict()
+        agenda = {}
         
         # Filter tasks for the target date
         relevant_tasks = self._get_tasks_for_date(tasks, target_date)
@@ -101,7 +126,7 @@ class AgendaView:
     
     def _get_weekly_view(self, tasks: List[Task], start_date: date, days: int = 7) -> Dict[str, List[Task]]:
         """Get agenda view for a week or custom day range."""
-        agenda = OrderedDict()
+        agenda = {}
         
         # Get start of week (Monday)
         if self.view_mode == "week":
@@ -116,18 +141,22 @@ class AgendaView:
             agenda["⚠️  OVERDUE"] = self._sort_tasks_by_due_date(overdue_tasks)
         
         # Add each day of the period
+        date_index = self._build_date_index(tasks)
+        today = date.today()
+        tomorrow = today + timedelta(days=1)
         for i in range(days):
             current_date = week_start + timedelta(days=i)
-            day_tasks = self._get_tasks_for_date(tasks, current_date)
+            day_tasks = date_index.get(current_date, [])
             
-            if day_tasks or current_date == date.today():
+            if day_tasks or current_date == today:
                 # Format day header
-                if current_date == date.today():
-                    day_header = f"📅 TODAY - {current_date.strftime('%A, %b %d')}"
-                elif current_date == date.today() + timedelta(days=1):
-                    day_header = f"📅 TOMORROW - {current_date.strftime('%A, %b %d')}"
+                day_label = f"{_WEEKDAY_NAMES[current_date.weekday()]}, {_format_short_date(current_date)}"
+                if current_date == today:
+                    day_header = f"📅 TODAY - {day_label}"
+                elif current_date == tomorrow:
+                    day_header = f"📅 TOMORROW - {day_label}"
                 else:
-                    day_header = f"📅 {current_date.strftime('%A, %b %d')}"
+                    day_header = f"📅 {day_label}"
                 
                 if day_tasks:
                     agenda[day_header] = self._sort_tasks_for_day(day_tasks)
@@ -148,56 +177,91 @@ class AgendaView:
     
     def _get_monthly_view(self, tasks: List[Task], target_date: date) -> Dict[str, List[Task]]:
         """Get agenda view for a month."""
-        agenda = OrderedDict()
+        agenda = {}
         
         # Get month boundaries
         month_start = target_date.replace(day=1)
         days_in_month = monthrange(target_date.year, target_date.month)[1]
         month_end = month_start + timedelta(days=days_in_month - 1)
         
-        # Group tasks by week within the month
-        current_date = month_start
-        week_num = 1
-        
-        while current_date <= month_end:
-            # Get week start (Monday)
-            days_since_monday = current_date.weekday()
-            week_start = current_date - timedelta(days=days_since_monday)
+        # Bucket tasks by the Monday of their week in a single pass
+        week_buckets = defaultdict(list)
+        for task in tasks:
+            task_date = self._get_task_date(task)
+            if task_date:
+                week_buckets[task_date - timedelta(days=task_date.weekday())].append(task)
+        
+        # Group tasks by week within the month. Only weeks that actually hold
+        # tasks are visited; the week number is the week's offset from the
+        # Monday on or before the 1st.
+        first_week_start = month_start - timedelta(days=month_start.weekday())
+        weeks_with_tasks = sorted(
+            week_start for week_start in week_buckets
+            if first_week_start <= week_start <= month_end
+        )
+        
+        for week_start in weeks_with_tasks:
+            week_num = (week_start - first_week_start).days // 7 + 1
             week_end = week_start + timedelta(days=6)
-            
-            # Collect tasks for this week
-            week_tasks = []
-            for task in tasks:
-                task_date = self._get_task_date(task)
-                if task_date and week_start <= task_date <= week_end:
-                    week_tasks.append(task)
-            
-            if week_tasks:
-                week_header = f"Week {week_num} ({week_start.strftime('%b %d')} - {week_end.strftime('%b %d')})"
-                agenda[week_header] = self._sort_tasks_by_due_date(week_tasks)
-            
-            # Move to next week
-            current_date = week_end + timedelta(days=1)
-            week_num += 1
+            week_header = f"Week {week_num} ({_format_short_date(week_start)} - {_format_short_date(week_end)})"
+            agenda[week_header] = self._sort_tasks_by_due_date(week_buckets[week_start])
         
         return agenda
     
     def _get_tasks_for_date(self, tasks: List[Task], target_date: date) -> List[Task]:
         """Get all tasks relevant for a specific date."""
         relevant_tasks = []
+        today = date.today()
         
         for task in tasks:
             if not self.show_completed and task.status == TaskStatus.DONE:
                 continue
             
             # Check if task is relevant for this date
-            if self._is_task_relevant_for_date(task, target_date):
+            if self._is_task_relevant_for_date(task, target_date, today):
                 relevant_tasks.append(task)
         
         return relevant_tasks
     
-    def _is_task_relevant_for_date(self, task: Task, target_date: date) -> bool:
-        """Check if a task is relevant for a specific date."""
+    def _build_date_index(self, tasks: List[Task]) -> Dict[date, List[Task]]:
+        """
+        Bucket tasks by every date they are relevant for.
+        
+        Gives the same per-day lists as _get_tasks_for_date, but walks the
+        task list once instead of once per day in the view.
+        """
+        date_index = defaultdict(list)
+        today = date.today()
+        
+        for task in tasks:
+            if not self.show_completed and task.status == TaskStatus.DONE:
+                continue
+            
+            for task_date in self._get_relevant_dates(task, today):
+                date_index[task_date].append(task)
+        
+        return date_index
+    
+    def _get_relevant_dates(self, task: Task, today: date) -> set:
+        """Get every date a task is relevant for (see _is_task_relevant_for_date)."""
+        task_dates = set()
+        if task.due_date:
+            task_dates.add(task.due_date.date())
+        if task.scheduled_date:
+            task_dates.add(task.scheduled_date.date())
+        if task.deadline:
+            task_dates.add(task.deadline.date())
+        
+        # Unscheduled high priority tasks show up on today's agenda
+        if (not task.due_date and not task.scheduled_date and 
+            task.priority in _IMPORTANT_PRIORITIES and
+            task.status != TaskStatus.DONE):
+            task_dates.add(today)
+        
+        return task_dates
+    
+    def _is_task_relevant_for_date(self, task: Task, target_date: date, today: date) -> bool:
+        """Check if a task is relevant for a specific date, given today's date."""
         # Due date matches
         if task.due_date and task.due_date.date() == target_date:
             return True
@@ -212,9 +276,9 @@ class AgendaView:
         
         # For unscheduled tasks, show if they're high priority and not done
         if (not task.due_date and not task.scheduled_date and 
-            task.priority in [TaskPriority.HIGH, TaskPriority.URGENT] and
+            task.priority in _IMPORTANT_PRIORITIES and
             task.status != TaskStatus.DONE and
-            target_date == date.today()):
+            target_date == today):
             return True
         
         return False
@@ -226,7 +290,7 @@ class AgendaView:
         for task in tasks:
             if (task.due_date and 
                 task.due_date.date() < before_date and 
-                task.status not in [TaskStatus.DONE, TaskStatus.CANCELLED]):
+                task.status not in _CLOSED_STATUSES):
                 overdue.append(task)
         
         return overdue
@@ -240,7 +304,7 @@ class AgendaView:
         for task in tasks:
             if (task.deadline and 
                 after_date <= task.deadline.date() <= cutoff_date and
-                task.status not in [TaskStatus.DONE, TaskStatus.CANCELLED]):
+                task.status not in _CLOSED_STATUSES):
                 upcoming.append(task)
         
         return upcoming
@@ -252,7 +316,7 @@ class AgendaView:
         for task in tasks:
             if (not task.due_date and 
                 not task.scheduled_date and
-                task.priority in [TaskPriority.HIGH, TaskPriority.URGENT] and
+                task.priority in _IMPORTANT_PRIORITIES and
                 task.status == TaskStatus.TODO):
                 unscheduled.append(task)
         
@@ -271,29 +335,25 @@ class AgendaView:
     
     def _sort_tasks_for_day(self, tasks: List[Task]) -> List[Task]:
         """Sort tasks appropriately for daily view."""
-        # First by time (if scheduled), then by priority
-        def sort_key(task):
-            time_priority = 0
-            if task.scheduled_date:
-                time_priority = task.scheduled_date.hour * 60 + task.scheduled_date.minute
-            else:
-                time_priority = 9999  # Unscheduled tasks go to end
-            
-            return (time_priority, -task.get_priority_value(), task.title.lower())
-        
-        return sorted(tasks, key=sort_key)
+        # First by time (if scheduled), then by priority; unscheduled tasks go to end
+        keys = [
+            (t.scheduled_date.hour * 60 + t.scheduled_date.minute if t.scheduled_date else 9999,
+             -t.get_priority_value(), t.title.lower())
+            for t in tasks
+        ]
+        return _sort_by_keys(tasks, keys)
     
     def _sort_tasks_by_time(self, tasks: List[Task]) -> List[Task]:
         """Sort tasks by scheduled time."""
-        return sorted(tasks, key=lambda t: t.scheduled_date or datetime.max)
+        return _sort_by_keys(tasks, [t.scheduled_date or datetime.max for t in tasks])
     
     def _sort_tasks_by_due_date(self, tasks: List[Task]) -> List[Task]:
         """Sort tasks by due date."""
-        return sorted(tasks, key=lambda t: t.due_date or datetime.max)
+        return _sort_by_keys(tasks, [t.due_date or datetime.max for t in tasks])
     
     def _sort_tasks_by_priority(self, tasks: List[Task]) -> List[Task]:
         """Sort tasks by priority (high to low)."""
-        return sorted(tasks, key=lambda t: (-t.get_priority_value(), t.title.lower()))
+        return _sort_by_keys(tasks, [(-t.get_priority_value(), t.title.lower()) for t in tasks])
     
     def get_calendar_grid(self, target_date: date) -> List[List[Optional[int]]]:
         """
@@ -366,26 +426,25 @@ class AgendaView:
             Dictionary with week summary information
         """
         week_end = week_start + timedelta(days=6)
-        week_tasks = []
+        total_tasks = completed_tasks = high_priority = overdue = 0
+        per_day = Counter()
         
-        # Collect tasks for the week
+        # Collect statistics for the week's tasks in a single pass
         for task in tasks:
             task_date = self._get_task_date(task)
-            if task_date and week_start <= task_date <= week_end:
-                week_tasks.append(task)
-        
-        # Calculate statistics
-        total_tasks = len(week_tasks)
-        completed_tasks = len([t for t in week_tasks if t.status == TaskStatus.DONE])
-        high_priority = len([t for t in week_tasks if t.priority in [TaskPriority.HIGH, TaskPriority.URGENT]])
-        overdue = len([t for t in week_tasks if t.is_overdue()])
+            if not task_date or not week_start <= task_date <= week_end:
+                continue
+            total_tasks += 1
+            completed_tasks += task.status == TaskStatus.DONE
+            high_priority += task.priority in _IMPORTANT_PRIORITIES
+            overdue += bool(task.is_overdue())
+            per_day[task_date] += 1
         
         # Get daily breakdown
         daily_counts = {}
         for i in range(7):
             day = week_start + timedelta(days=i)
-            day_tasks = [t for t in week_tasks if self._get_task_date(t) == day]
-            daily_counts[day.strftime('%A')] = len(day_tasks)
+            daily_counts[_WEEKDAY_NAMES[day.weekday()]] = per_day[day]
         
         return {
             'week_start': week_start,
@@ -462,7 +521,7 @@ class AgendaView:
         Returns:
             Dictionary with time blocks as keys
         """
-        time_blocks = OrderedDict()
+        time_blocks = {}
         day_tasks = self._get_tasks_for_date(tasks, target_date)
         
         # Create hourly time blocks
@@ -486,58 +545,60 @@ class AgendaView:
     
     def get_agenda_statistics(self, tasks: List[Task]) -> Dict[str, Any]:
         """Get comprehensive agenda statistics."""
-        today = date.today()
-        
-        return {
-            'today_tasks': len(self._get_tasks_for_date(tasks, today)),
-            'overdue_tasks': len(self._get_overdue_tasks(tasks, today)),
-            'week_tasks': len(self._get_tasks_for_date(tasks, today + timedelta(days=7))),
-            'upcoming_deadlines': len(self._get_upcoming_deadlines(tasks, today)),
-            'unscheduled_important': len(self._get_unscheduled_important_tasks(tasks)),
-            'completion_rate_week': self._calculate_week_completion_rate(tasks, today),
-            'average_daily_tasks': self._calculate_average_daily_tasks(tasks),
-            'busiest_day_this_week': self._get_busiest_day_this_week(tasks, today)
-        }
-    
-    def _calculate_week_completion_rate(self, tasks: List[Task], base_date: date) -> float:
-        """Calculate completion rate for the current week."""
-        week_start = base_date - timedelta(days=base_date.weekday())
-        week_tasks = []
-        
-        for i in range(7):
-            day = week_start + timedelta(days=i)
-            week_tasks.extend(self._get_tasks_for_date(tasks, day))
-        
-        if not week_tasks:
-            return 0.0
-        
-        completed = len([t for t in week_tasks if t.status == TaskStatus.DONE])
-        return (completed / len(week_tasks)) * 100
+        return self._collect_all_stats(tasks, date.today())
     
-    def _calculate_average_daily_tasks(self, tasks: List[Task]) -> float:
-        """Calculate average number of tasks per day over the last 7 days."""
-        today = date.today()
-        total_tasks = 0
-        
-        for i in range(7):
-            day = today - timedelta(days=i)
-            day_tasks = self._get_tasks_for_date(tasks, day)
-            total_tasks += len(day_tasks)
+    def _collect_all_stats(self, tasks: List[Task], today: date) -> Dict[str, Any]:
+        """
+        Compute every agenda statistic in a single pass over the tasks.
         
-        return total_tasks / 7
-    
-    def _get_busiest_day_this_week(self, tasks: List[Task], base_date: date) -> str:
-        """Get the busiest day of the current week."""
-        week_start = base_date - timedelta(days=base_date.weekday())
-        day_counts = {}
+        Per-day figures use the same relevance rules as _get_tasks_for_date,
+        so a task relevant on several days counts once for each of them.
+        """
+        week_start = today - timedelta(days=today.weekday())
+        week_end = week_start + timedelta(days=6)
+        next_week_day = today + timedelta(days=7)
+        recent_start = today - timedelta(days=6)
+        deadline_cutoff = today + timedelta(days=14)
         
-        for i in range(7):
-            day = week_start + timedelta(days=i)
-            day_name = day.strftime('%A')
-            day_tasks = self._get_tasks_for_date(tasks, day)
-            day_counts[day_name] = len(day_tasks)
+        today_count = overdue_count = week_count = upcoming_count = unscheduled_count = 0
+        week_total = week_completed = recent_total = 0
+        weekday_counts = [0] * 7
         
-        if not day_counts:
-            return "None"
+        for task in tasks:
+            is_closed = task.status in _CLOSED_STATUSES
+            
+            if task.due_date and task.due_date.date() < today and not is_closed:
+                overdue_count += 1
+            if task.deadline and today <= task.deadline.date() <= deadline_cutoff and not is_closed:
+                upcoming_count += 1
+            if (not task.due_date and not task.scheduled_date and
+                task.priority in _IMPORTANT_PRIORITIES and task.status == TaskStatus.TODO):
+                unscheduled_count += 1
+            
+            if not self.show_completed and task.status == TaskStatus.DONE:
+                continue
+            is_done = task.status == TaskStatus.DONE
+            for task_date in self._get_relevant_dates(task, today):
+                if task_date == today:
+                    today_count += 1
+                if task_date == next_week_day:
+                    week_count += 1
+                if week_start <= task_date <= week_end:
+                    week_total += 1
+                    week_completed += is_done
+                    weekday_counts[task_date.weekday()] += 1
+                if recent_start <= task_date <= today:
+                    recent_total += 1
+        
+        day_counts = dict(zip(_WEEKDAY_NAMES, weekday_counts))
         
-        return max(day_counts, key=day_counts.get)
\ No newline at end of file
+        return {
+            'today_tasks': today_count,
+            'overdue_tasks': overdue_count,
+            'week_tasks': week_count,
+            'upcoming_deadlines': upcoming_count,
+            'unscheduled_important': min(unscheduled_count, 5),
+            'completion_rate_week': (week_completed / week_total) * 100 if week_total else 0.0,
+            'average_daily_tasks': recent_total / 7,
+            'busiest_day_this_week': max(day_counts, key=day_counts.get)
+        }
\ No newline at end of file
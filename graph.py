@@ -10,29 +10,103 @@
 
 import re
 import math
+import functools
+from collections import namedtuple
+import numpy as np
 from typing import List, Dict, Tuple, Optional
 from task_manager import Task
+from graph_numba import CONVERGENCE_EPS, NUMBA_AVAILABLE, njit, _fr_iterate
 
 # --- 1. Graph Construction ---
+_LINK_RE = re.compile(r'\[\[([a-f0-9\-]+)\]\]')
+
 def find_links(tasks: List[Task]) -> List[Tuple[str, str]]:
     """Parse all task descriptions to find [[id]] links."""
-    links = []
+    links = set()
     task_ids = {task.id for task in tasks}
-    link_pattern = re.compile(r'\[\[([a-f0-9\-]+)\]\]')
 
     for task in tasks:
-        # Find links in the description
-        found_ids = link_pattern.findall(task.description)
-        for target_id in found_ids:
-            if target_id in task_ids and task.id != target_id:
-                links.append((task.id, target_id))
+        # Find links in the description, skipping the regex when there can't be any
+        if '[[' in task.description:
+            for target_id in _LINK_RE.findall(task.description):
+                if target_id in task_ids and task.id != target_id:
+                    links.add((task.id, target_id))
         # Also add parent-child links for structure
         if task.parent_id and task.parent_id in task_ids:
-            links.append((task.id, task.parent_id))
+            links.add((task.id, task.parent_id))
             
-    return list(set(links)) # Return unique links
+    return list(links) # Return unique links
 
 # --- 2. Force-Directed Layout ---
+def _iterate_numpy(x, y, src_idx, tgt_idx, boost, k, width, height, central_idx, iterations):
+    """Pure NumPy fallback for the layout loop, used when Numba is unavailable."""
+    n = len(x)
+    # Scratch buffers, allocated once and reused by every iteration
+    pair_dx = np.empty((n, n), dtype=np.float32)
+    pair_dy = np.empty((n, n), dtype=np.float32)
+    scale = np.empty((n, n), dtype=np.float32)
+    square = np.empty((n, n), dtype=np.float32)
+    ax = np.empty(n, dtype=np.float32)
+    ay = np.empty(n, dtype=np.float32)
+    new_x = np.empty(n, dtype=np.float32)
+    new_y = np.empty(n, dtype=np.float32)
+
+    for _ in range(iterations):
+        # Calculate repulsive forces (all nodes push each other away).
+        # Each pair contributes d / dist * (k^2 / dist) = d * k^2 / dist^2.
+        np.subtract(x[:, None], x[None, :], out=pair_dx)
+        np.subtract(y[:, None], y[None, :], out=pair_dy)
+        np.multiply(pair_dx, pair_dx, out=scale)
+        np.multiply(pair_dy, pair_dy, out=square)
+        scale += square
+        np.sqrt(scale, out=scale)
+        scale += 0.01
+        np.multiply(scale, scale, out=scale)
+        np.divide(k * k, scale, out=scale)
+        np.fill_diagonal(scale, 0)
+        pair_dx *= scale
+        pair_dy *= scale
+        pair_dx.sum(axis=1, out=ax)
+        pair_dy.sum(axis=1, out=ay)
+
+        # Calculate attractive forces (edges pull nodes together)
+        if len(src_idx):
+            ex = x[src_idx] - x[tgt_idx]
+            ey = y[src_idx] - y[tgt_idx]
+            edist = np.sqrt(ex * ex + ey * ey) + 0.01
+            eforce = edist * edist / k * boost
+            cx = ex / edist * eforce
+            cy = ey / edist * eforce
+            np.add.at(ax, src_idx, -cx)
+            np.add.at(ax, tgt_idx, cx)
+            np.add.at(ay, src_idx, -cy)
+            np.add.at(ay, tgt_idx, cy)
+
+        # Apply forces, limiting total displacement and
+        # preventing nodes from escaping the canvas
+        np.multiply(ax, 0.01, out=new_x)
+        np.multiply(ay, 0.01, out=new_y)
+        new_x += x
+        new_y += y
+        np.clip(new_x, 0, width - 1, out=new_x)
+        np.clip(new_y, 0, height - 1, out=new_y)
+
+        # If a central node is selected, pin it to the center
+        if central_idx >= 0:
+            new_x[central_idx] = width / 2
+            new_y[central_idx] = height / 2
+
+        # The forces are spent, so ax/ay can hold this step's movement
+        np.subtract(new_x, x, out=ax)
+        np.subtract(new_y, y, out=ay)
+        moved = float(np.dot(ax, ax) + np.dot(ay, ay))
+        np.copyto(x, new_x)
+        np.copyto(y, new_y)
+
+        # Stop once the layout has settled
+        if moved < CONVERGENCE_EPS * n:
+            break
+
 def force_layout(
     nodes: Dict[str, Dict],
     edges: List[Tuple[str, str]],
@@ -41,68 +115,58 @@ def force_layout(
     iterations: int = 100,
     central_node_id: Optional[str] = None
 ) -> Dict[str, Dict]:
-    """A simple Fruchterman-Reingold-inspired force-directed layout algorithm."""
+    """
+    A simple Fruchterman-Reingold-inspired force-directed layout algorithm.
+
+    Node positions are unpacked into parallel NumPy arrays (Structure-of-Arrays)
+    and iterated by the Numba kernel in graph_numba, or by broadcast array ops
+    when Numba is unavailable. The final positions are written back into `nodes`.
+    """
     if not nodes: return {}
-    # Ideal distance between nodes
-    k = math.sqrt((width * height) / len(nodes))
-    
-    for _ in range(iterations):
-        # Calculate repulsive forces (all nodes push each other away)
-        for i, node1 in nodes.items():
-            node1['dx'] = 0.0
-            node1['dy'] = 0.0
-            for j, node2 in nodes.items():
-                if i != j:
-                    dx = node1['x'] - node2['x']
-                    dy = node1['y'] - node2['y']
-                    distance = math.sqrt(dx**2 + dy**2) + 0.01
-                    if distance > 0:
-                        force = k**2 / distance
-                        node1['dx'] += dx / distance * force
-                        node1['dy'] += dy / distance * force
+    ids = list(nodes)
+    id2idx = {node_id: i for i, node_id in enumerate(ids)}
+    n = len(ids)
+    x = np.fromiter((nodes[node_id]['x'] for node_id in ids), dtype=np.float32, count=n)
+    y = np.fromiter((nodes[node_id]['y'] for node_id in ids), dtype=np.float32, count=n)
+    # Ideal distance between nodes; float32 like the positions so nothing promotes
+    k = np.float32(math.sqrt((width * height) / n))
 
-        # Calculate attractive forces (edges pull nodes together)
-        for source, target in edges:
-            if source not in nodes or target not in nodes: continue
-            node1 = nodes[source]
-            node2 = nodes[target]
-            dx = node1['x'] - node2['x']
-            dy = node1['y'] - node2['y']
-            distance = math.sqrt(dx**2 + dy**2) + 0.01
-            force = distance**2 / k
-            
-            # Make central node's pull stronger
-            if central_node_id and (source == central_node_id or target == central_node_id):
-                 force *= 2.5
-
-            node1['dx'] -= dx / distance * force
-            node2['dx'] += dx / distance * force
-            node1['dy'] -= dy / distance * force
-            node2['dy'] += dy / distance * force
-
-        # Apply forces and center graph
-        for node_id, node in nodes.items():
-            # If a central node is selected, pin it to the center
-            if node_id == central_node_id:
-                node['x'] = width / 2
-                node['y'] = height / 2
-                continue
-
-            # Limit total displacement
-            disp_x = node['dx'] * 0.01
-            disp_y = node['dy'] * 0.01
-            node['x'] += disp_x
-            node['y'] += disp_y
-            
-            # Prevent nodes from escaping the canvas
-            node['x'] = min(width - 1, max(0, node['x']))
-            node['y'] = min(height - 1, max(0, node['y']))
-            
+    # Edge endpoints as index arrays, built once for all iterations
+    pairs = [(id2idx[s], id2idx[t]) for s, t in edges if s in id2idx and t in id2idx]
+    src_idx = np.array([s for s, _ in pairs], dtype=np.intp)
+    tgt_idx = np.array([t for _, t in pairs], dtype=np.intp)
+    central_idx = id2idx.get(central_node_id, -1) if central_node_id else -1
+
+    if NUMBA_AVAILABLE:
+        dx = np.zeros(n, dtype=np.float32)
+        dy = np.zeros(n, dtype=np.float32)
+        _fr_iterate(x, y, dx, dy, src_idx, tgt_idx, k, np.float32(width), np.float32(height), central_idx, iterations)
+    else:
+        # Make central node's pull stronger
+        boost = np.ones(len(pairs), dtype=np.float32)
+        if central_idx >= 0:
+            boost[(src_idx == central_idx) | (tgt_idx == central_idx)] = 2.5
+        _iterate_numpy(x, y, src_idx, tgt_idx, boost, k, width, height, central_idx, iterations)
+
+    for i, node_id in enumerate(ids):
+        nodes[node_id]['x'] = float(x[i])
+        nodes[node_id]['y'] = float(y[i])
     return nodes
 
 # --- 3. ASCII Rendering ---
+# The grid holds one Unicode code point per cell so titles outside ASCII survive.
+_SPACE = ord(' ')
+_DOT = ord('.')
+
+@njit(cache=True)
 def draw_line(grid, x1, y1, x2, y2):
-    """Draw a line on the grid using Bresenham's algorithm."""
+    """
+    Draw a line on the grid using Bresenham's algorithm.
+
+    `grid` is indexed as grid[y][x], so this works on the NumPy grid when
+    compiled and on a list of bytearray rows when running as plain Python.
+    """
+    height, width = len(grid), len(grid[0])
     dx = abs(x2 - x1)
     dy = -abs(y2 - y1)
     sx = 1 if x1 < x2 else -1
@@ -110,8 +174,8 @@ def draw_line(grid, x1, y1, x2, y2):
     err = dx + dy
     
     while True:
-        if 0 <= y1 < len(grid) and 0 <= x1 < len(grid[0]) and grid[y1][x1] == ' ':
-            grid[y1][x1] = '.'
+        if 0 <= y1 < height and 0 <= x1 < width and grid[y1][x1] == _SPACE:
+            grid[y1][x1] = _DOT
         if x1 == x2 and y1 == y2:
             break
         e2 = 2 * err
@@ -122,15 +186,24 @@ def draw_line(grid, x1, y1, x2, y2):
             err += dx
             y1 += sy
 
-def render_to_grid(nodes: Dict, edges: List, width: int, height: int, central_node_id: Optional[str]) -> List[List[str]]:
-    """Render the positioned nodes and edges onto a character grid."""
-    grid = [[' ' for _ in range(width)] for _ in range(height)]
+def render_to_grid(nodes: Dict, edges: List, width: int, height: int, central_node_id: Optional[str]) -> np.ndarray:
+    """Render the positioned nodes and edges onto a (height, width) grid of code points."""
+    if NUMBA_AVAILABLE:
+        grid = np.full((height, width), _SPACE, dtype=np.uint32)
+        canvas = grid
+    else:
+        # Edges are pure ASCII, so plain Python draws them into bytearray rows,
+        # which index far faster than NumPy scalars
+        canvas = [bytearray(b' ' * width) for _ in range(height)]
 
     # Draw edges first
     for source, target in edges:
         if source not in nodes or target not in nodes: continue
         n1, n2 = nodes[source], nodes[target]
-        draw_line(grid, int(n1['x']), int(n1['y']), int(n2['x']), int(n2['y']))
+        draw_line(canvas, int(n1['x']), int(n1['y']), int(n2['x']), int(n2['y']))
+
+    if not NUMBA_AVAILABLE:
+        grid = np.frombuffer(b''.join(canvas), dtype=np.uint8).reshape(height, width).astype(np.uint32)
     
     # Draw nodes on top
     for node_id, data in nodes.items():
@@ -141,26 +214,40 @@ def render_to_grid(nodes: Dict, edges: List, width: int, height: int, central_no
         label = f"<{title}>" if is_central else f"[{title}]"
         
         if 0 <= y < height and 0 <= x < width - len(label):
-            for i, char in enumerate(label):
-                if x + i < width:
-                    grid[y][x+i] = char
+            grid[y, x:x + len(label)] = np.frombuffer(label.encode('utf-32-le'), dtype='<u4')
     return grid
 
+# Compile draw_line at import, like the layout kernel
+if NUMBA_AVAILABLE:
+    draw_line(np.full((1, 1), _SPACE, dtype=np.uint32), 0, 0, 0, 0)
+
 # --- Main Function ---
+# The task fields the graph depends on; a tuple of these is the render cache key.
+_GraphTask = namedtuple('_GraphTask', ['id', 'parent_id', 'description', 'title'])
+
 def generate_ascii_graph(tasks: List[Task], width: int, height: int, central_node_id: Optional[str] = None) -> str:
     """
     The main function to generate the ASCII graph from a list of tasks.
+    Repeated calls with unchanged tasks and canvas reuse the cached drawing.
     """
     if not tasks:
         return "No tasks to build a graph from."
 
-    # 1. Build graph data structures
+    graph_tasks = tuple(sorted(_GraphTask(t.id, t.parent_id, t.description, t.title) for t in tasks))
+    return _generate_ascii_graph_cached(graph_tasks, width, height, central_node_id)
+
+@functools.lru_cache(maxsize=32)
+def _generate_ascii_graph_cached(tasks: Tuple[_GraphTask, ...], width: int, height: int, central_node_id: Optional[str]) -> str:
+    """Builds the graph for generate_ascii_graph; memoized on its hashable inputs."""
+    # 1. Build graph data structures, starting the nodes evenly spaced on an
+    # ellipse around the center so the layout is the same on every run
+    n = len(tasks)
     nodes_map = {
         task.id: {
             "title": task.title,
-            "x": width / 2 + (hash(task.id) % 10 - 5), # Start near center
-            "y": height / 2 + (hash(task.title) % 10 - 5),
-        } for task in tasks
+            "x": width / 2 + width / 4 * math.cos(2 * math.pi * idx / n),
+            "y": height / 2 + height / 4 * math.sin(2 * math.pi * idx / n),
+        } for idx, task in enumerate(tasks)
     }
     edges = find_links(tasks)
 
@@ -173,5 +260,5 @@ def generate_ascii_graph(tasks: List[Task], width: int, height: int, central_nod
     # 3. Render to grid
     grid = render_to_grid(positioned_nodes, edges, width, height, central_node_id)
 
-    # 4. Convert grid to string
-    return "\n".join("".join(row) for row in grid)
\ No newline at end of file
+    # 4. Convert grid to string; viewing each row as one fixed-width string avoids a per-cell join
+    return "\n".join(grid.view(f'U{width}')[:, 0])
\ No newline at end of file
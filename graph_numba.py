@@ -0,0 +1,282 @@
+# graph_numba.py
+#
+# Description:
+# This module holds the JIT-compiled kernels behind the force-directed layout
+# in graph.py. The kernels work on flat float32 position arrays and are
+# compiled with Numba when it is installed. If Numba is missing,
+# NUMBA_AVAILABLE is False and graph.py falls back to its NumPy implementation.
+#
+
+import numpy as np
+
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    prange = range
+
+    def njit(*args, **kwargs):
+        """Stand-in decorator so the kernels still import as plain Python."""
+        if args and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+# Tile size for the repulsion loop: 64 float32 per axis is 256 bytes,
+# so a tile of both axes plus its accumulators sits comfortably in L1D.
+BLOCK = 64
+
+# Barnes-Hut settings: graphs with at least BH_THRESHOLD nodes approximate
+# far-away cells by their centre of mass once cell_size / distance < THETA.
+# Cells stop splitting at MAX_DEPTH so coincident nodes share a leaf.
+BH_THRESHOLD = 64
+THETA = np.float32(0.9)
+MAX_DEPTH = 24
+
+# The layout stops early once the summed squared movement of all nodes in an
+# iteration drops below CONVERGENCE_EPS per node.
+CONVERGENCE_EPS = 1e-3
+
+# The kernels run entirely in float32: layout needs no more precision, and
+# float32 doubles the SIMD lanes. Constants are float32 so nothing promotes.
+_F0 = np.float32(0.0)
+_F1 = np.float32(1.0)
+_DIST_EPS = np.float32(0.01)  # Keeps distances away from zero
+_STEP = np.float32(0.01)  # Fraction of the force applied per iteration
+_CENTRAL_PULL = np.float32(2.5)
+
+@njit(parallel=True, fastmath=True, cache=True)
+def _direct_repulsion(x, y, dx, dy, k2):
+    """Exact O(N^2) repulsion, written into dx and dy."""
+    n = x.shape[0]
+    # The pair loop is tiled into BLOCK x BLOCK tiles so a block's
+    # positions stay in L1 across the inner sweep. Each block of i only
+    # writes its own dx/dy, so blocks run in parallel.
+    for bi in prange((n + BLOCK - 1) // BLOCK):
+        i0 = bi * BLOCK
+        i1 = min(i0 + BLOCK, n)
+        for i in range(i0, i1):
+            dx[i] = 0.0
+            dy[i] = 0.0
+        for j0 in range(0, n, BLOCK):
+            j1 = min(j0 + BLOCK, n)
+            for i in range(i0, i1):
+                xi = x[i]
+                yi = y[i]
+                fx = _F0
+                fy = _F0
+                for j in range(j0, j1):
+                    if i != j:
+                        ddx = xi - x[j]
+                        ddy = yi - y[j]
+                        distance = np.sqrt(ddx * ddx + ddy * ddy) + _DIST_EPS
+                        force = k2 / distance
+                        fx += ddx / distance * force
+                        fy += ddy / distance * force
+                dx[i] += fx
+                dy[i] += fy
+
+@njit(cache=True)
+def _build_quadtree(x, y, w, h, child, body, mass, com_x, com_y, center_x, center_y, half):
+    """
+    Inserts every node into a quadtree stored in flat arrays.
+
+    Cell 0 is the root covering the canvas. `child[c]` holds the four
+    quadrant children (-1 if absent), `body[c]` is the node held by a
+    leaf (-1 for internal cells) and `mass`/`com_x`/`com_y` end up as the
+    node count and centre of mass of each cell.
+
+    Returns:
+        The number of cells used.
+    """
+    child[0, :] = -1
+    body[0] = -1
+    mass[0] = 0.0
+    com_x[0] = 0.0
+    com_y[0] = 0.0
+    center_x[0] = w / 2
+    center_y[0] = h / 2
+    half[0] = max(w, h) / 2 + 1.0
+    count = 1
+
+    for p in range(x.shape[0]):
+        px = x[p]
+        py = y[p]
+        cell = 0
+        depth = 0
+        while True:
+            if body[cell] >= 0:
+                # Occupied leaf: coincident nodes pile up once we're too deep
+                if depth >= MAX_DEPTH:
+                    mass[cell] += 1.0
+                    com_x[cell] += px
+                    com_y[cell] += py
+                    break
+                # Otherwise push the resident node down into a new child
+                old = body[cell]
+                body[cell] = -1
+                q = (1 if x[old] >= center_x[cell] else 0) + (2 if y[old] >= center_y[cell] else 0)
+                quarter = half[cell] / 2
+                child[count, :] = -1
+                body[count] = old
+                mass[count] = mass[cell]
+                com_x[count] = com_x[cell]
+                com_y[count] = com_y[cell]
+                center_x[count] = center_x[cell] + (quarter if q & 1 else -quarter)
+                center_y[count] = center_y[cell] + (quarter if q & 2 else -quarter)
+                half[count] = quarter
+                child[cell, q] = count
+                count += 1
+
+            # Internal cell: account for p, then descend into its quadrant
+            mass[cell] += 1.0
+            com_x[cell] += px
+            com_y[cell] += py
+            q = (1 if px >= center_x[cell] else 0) + (2 if py >= center_y[cell] else 0)
+            nxt = child[cell, q]
+            if nxt == -1:
+                quarter = half[cell] / 2
+                child[count, :] = -1
+                body[count] = p
+                mass[count] = 1.0
+                com_x[count] = px
+                com_y[count] = py
+                center_x[count] = center_x[cell] + (quarter if q & 1 else -quarter)
+                center_y[count] = center_y[cell] + (quarter if q & 2 else -quarter)
+                half[count] = quarter
+                child[cell, q] = count
+                count += 1
+                break
+            cell = nxt
+            depth += 1
+
+    # Turn the coordinate sums into centres of mass
+    for c in range(count):
+        com_x[c] /= mass[c]
+        com_y[c] /= mass[c]
+    return count
+
+@njit(parallel=True, fastmath=True, cache=True)
+def _bh_repulsion(x, y, dx, dy, k2, child, body, mass, com_x, com_y, half):
+    """Barnes-Hut approximation of the repulsion, written into dx and dy."""
+    n = x.shape[0]
+    for bi in prange((n + BLOCK - 1) // BLOCK):
+        # Depth-first traversal pushes at most 3 cells per level
+        stack = np.empty(4 * (MAX_DEPTH + 2), dtype=np.int64)
+        for i in range(bi * BLOCK, min(bi * BLOCK + BLOCK, n)):
+            xi = x[i]
+            yi = y[i]
+            fx = _F0
+            fy = _F0
+            stack[0] = 0
+            sp = 1
+            while sp > 0:
+                sp -= 1
+                cell = stack[sp]
+                m = mass[cell]
+                if body[cell] == i and m == 1.0:
+                    continue
+                ddx = xi - com_x[cell]
+                ddy = yi - com_y[cell]
+                distance = np.sqrt(ddx * ddx + ddy * ddy) + _DIST_EPS
+                if body[cell] < 0 and half[cell] + half[cell] >= THETA * distance:
+                    # Too close to treat as one body: open the cell
+                    for q in range(4):
+                        if child[cell, q] >= 0:
+                            stack[sp] = child[cell, q]
+                            sp += 1
+                    continue
+                force = m * k2 / distance
+                fx += ddx / distance * force
+                fy += ddy / distance * force
+            dx[i] = fx
+            dy[i] = fy
+
+@njit(fastmath=True, cache=True)
+def _fr_iterate(x, y, dx, dy, edge_src, edge_tgt, k, w, h, central_idx, iters):
+    """
+    Runs `iters` Fruchterman-Reingold steps, updating x and y in place.
+
+    Args:
+        x, y: Node positions (float32 arrays of length N).
+        dx, dy: Scratch arrays of length N for the per-node displacement.
+        edge_src, edge_tgt: Edge endpoints as node indices.
+        k: The ideal distance between nodes (float32).
+        w, h: The canvas size (float32); nodes are clipped to it.
+        central_idx: Index of the node pinned to the center, or -1.
+        iters: Maximum number of iterations to run.
+
+    Returns:
+        The number of iterations actually run.
+    """
+    n = x.shape[0]
+    k2 = k * k
+    use_bh = n >= BH_THRESHOLD
+
+    # Quadtree storage, reused across iterations. Each insertion adds at
+    # most one cell per level plus its own leaf.
+    cap = n * (MAX_DEPTH + 1) + 1 if use_bh else 1
+    child = np.empty((cap, 4), dtype=np.int64)
+    body = np.empty(cap, dtype=np.int64)
+    mass = np.empty(cap, dtype=np.float32)
+    com_x = np.empty(cap, dtype=np.float32)
+    com_y = np.empty(cap, dtype=np.float32)
+    center_x = np.empty(cap, dtype=np.float32)
+    center_y = np.empty(cap, dtype=np.float32)
+    half = np.empty(cap, dtype=np.float32)
+
+    for it in range(iters):
+        # Calculate repulsive forces (all nodes push each other away)
+        if use_bh:
+            _build_quadtree(x, y, w, h, child, body, mass, com_x, com_y, center_x, center_y, half)
+            _bh_repulsion(x, y, dx, dy, k2, child, body, mass, com_x, com_y, half)
+        else:
+            _direct_repulsion(x, y, dx, dy, k2)
+
+        # Calculate attractive forces (edges pull nodes together).
+        # Kept serial: two edges can write to the same node.
+        for e in range(edge_src.shape[0]):
+            s = edge_src[e]
+            t = edge_tgt[e]
+            ddx = x[s] - x[t]
+            ddy = y[s] - y[t]
+            distance = np.sqrt(ddx * ddx + ddy * ddy) + _DIST_EPS
+            force = distance * distance / k
+            # Make central node's pull stronger
+            if s == central_idx or t == central_idx:
+                force *= _CENTRAL_PULL
+            dx[s] -= ddx / distance * force
+            dx[t] += ddx / distance * force
+            dy[s] -= ddy / distance * force
+            dy[t] += ddy / distance * force
+
+        # Apply forces and center graph
+        moved = 0.0
+        for i in range(n):
+            # If a central node is selected, pin it to the center
+            if i == central_idx:
+                x[i] = w / 2
+                y[i] = h / 2
+                continue
+            new_x = min(w - _F1, max(_F0, x[i] + dx[i] * _STEP))
+            new_y = min(h - _F1, max(_F0, y[i] + dy[i] * _STEP))
+            moved += (new_x - x[i]) ** 2 + (new_y - y[i]) ** 2
+            x[i] = new_x
+            y[i] = new_y
+
+        # Stop once the layout has settled
+        if moved < CONVERGENCE_EPS * n:
+            return it + 1
+    return iters
+
+def _warm_up():
+    """Compile the kernels for the argument types graph.py passes them."""
+    pos = np.zeros(2, dtype=np.float32)
+    scratch = np.zeros(2, dtype=np.float32)
+    edges = np.zeros(1, dtype=np.intp)
+    _fr_iterate(pos, pos.copy(), scratch, scratch.copy(), edges, edges + 1,
+                np.float32(1.0), np.float32(2.0), np.float32(2.0), -1, 1)
+
+# Compile at import so the first interactive render doesn't pay for it
+if NUMBA_AVAILABLE:
+    _warm_up()
@@ -3,15 +3,15 @@ import curses
 import sys
 from ui import App
 from task_manager import TaskManager
-from storage import JsonStorage
+from storage import SqliteStorage
 
 def main(stdscr):
     """The main function managed by curses.wrapper."""
     curses.curs_set(0) # Hide the cursor
-    stdscr.nodelay(True) # Make getch non-blocking to allow for resize events
 
     # Initialize backend components
-    storage = JsonStorage("tasks.json")
+    # Tasks live in tasks.db; an existing tasks.json is imported on first run
+    storage = SqliteStorage("tasks.db", legacy_json="tasks.json")
     task_manager = TaskManager(storage)
     
     # Get initial screen dimensions
@@ -19,7 +19,12 @@ def main(stdscr):
 
     # Create and run the App
     app = App(stdscr, task_manager, height, width)
-    app.run()
+    try:
+        app.run()
+    finally:
+        # Write any pending changes, even if the app crashed
+        task_manager.flush()
+        storage.close()
 
 if __name__ == "__main__":
     try:
@@ -34,15 +34,10 @@ class ReminderManager:
         now = datetime.datetime.now()
         due_tasks = []
 
-        all_tasks = self.task_manager.tasks.values()
-        for task in all_tasks:
-            # Check if task is due, not done, and not already notified
-            if (
-                task.due_date
-                and task.due_date <= now
-                and task.id not in self.notified_task_ids
-                and task.status != "DONE"
-            ):
+        # The TaskManager hands over only the open tasks that became due since the last check
+        for task in self.task_manager.pop_due_tasks(now):
+            # Check the task hasn't already been notified
+            if task.id not in self.notified_task_ids:
                 due_tasks.append(task)
                 self.notified_task_ids.add(task.id)
                 
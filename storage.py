@@ -1,14 +1,17 @@
 # storage.py
 #
 # Description:
-# This file handles the persistence of task data. It provides a class
-# for saving tasks to and loading tasks from a JSON file. This abstracts
-# the file I/O operations away from the main application logic.
+# This file handles the persistence of task data. It provides a SQLite
+# backend that stores one row per task, so a change only rewrites the rows
+# it touches, and a class for importing/exporting tasks as a JSON file.
+# This abstracts the file I/O operations away from the main application logic.
 #
 
+import os
 import json
+import sqlite3
 import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Optional
 from task_manager import Task, Status, Priority
 
 class TaskEncoder(json.JSONEncoder):
@@ -20,7 +23,7 @@ class TaskEncoder(json.JSONEncoder):
                 'id': obj.id,
                 'title': obj.title,
                 'description': obj.description,
-                'author': getattr(obj, 'author', None), # NEW: Safely get author
+                'author': obj.author,
                 'status': obj.status.value,
                 'priority': obj.priority.value,
                 'due_date': obj.due_date.isoformat() if obj.due_date else None,
@@ -87,5 +90,156 @@ class JsonStorage:
         Args:
             tasks: A list of Task objects to be saved.
         """
-        with open(self.filepath, 'w', encoding='utf-8') as f:
-            json.dump(tasks, f, cls=TaskEncoder, indent=4)
\ No newline at end of file
+        # Write to a temporary file and swap it in, so a crash mid-write
+        # never leaves a truncated task file behind
+        tmp_path = self.filepath + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(tasks, f, cls=TaskEncoder, indent=4)
+        os.replace(tmp_path, self.filepath)
+
+# Column order of the tasks table; tags are stored as a JSON array
+_COLUMNS = ('id', 'parent_id', 'title', 'status', 'priority', 'due_date',
+            'created_at', 'author', 'description', 'tags')
+_SELECT_SQL = f"SELECT {', '.join(_COLUMNS)} FROM tasks"
+_UPSERT_SQL = f"INSERT OR REPLACE INTO tasks ({', '.join(_COLUMNS)}) VALUES ({', '.join('?' * len(_COLUMNS))})"
+# Deletes a task together with every descendant still stored under it.
+# UNION (not UNION ALL) drops ids already visited, so a parent_id cycle can't recurse forever.
+_DELETE_SUBTREE_SQL = (
+    "WITH RECURSIVE doomed(id) AS ("
+    "VALUES(?) UNION SELECT t.id FROM tasks t JOIN doomed ON t.parent_id = doomed.id"
+    ") DELETE FROM tasks WHERE id IN doomed"
+)
+
+# PRAGMA user_version value recording that the legacy JSON import has been done
+_JSON_IMPORTED = 1
+
+def _row_from_dict(task_dict: Dict[str, Any]) -> tuple:
+    """Turns a JSON-style task dict (as written by TaskEncoder) into a table row."""
+    return (
+        task_dict['id'],
+        task_dict.get('parent_id'),
+        task_dict.get('title'),
+        task_dict.get('status'),
+        task_dict.get('priority'),
+        task_dict.get('due_date'),
+        task_dict.get('created_at'),
+        task_dict.get('author'),
+        task_dict.get('description', ''),
+        json.dumps(task_dict.get('tags') or []),
+    )
+
+class SqliteStorage:
+    """
+    Handles saving and loading tasks to/from a SQLite database.
+
+    Each task is one row keyed by its ID, so adding, changing or deleting a
+    task only writes the rows involved.
+    """
+    def __init__(self, filepath: str, legacy_json: Optional[str] = None):
+        """
+        Opens (and if needed creates) the database.
+        
+        Args:
+            filepath: The path to the SQLite database file.
+            legacy_json: An optional JSON task file to import once, the first
+                         time the database is opened, e.g. from an older version.
+        """
+        self.filepath = filepath
+        self._encoder = TaskEncoder()
+        # TaskManager flushes from a timer thread, so the connection may be
+        # used off the thread that opened it; TaskManager serializes access.
+        self.conn = sqlite3.connect(filepath, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA temp_store=MEMORY")
+        self._create_schema()
+        if legacy_json:
+            self._import_json(legacy_json)
+
+    def _create_schema(self):
+        """Creates the tasks table if it doesn't exist yet."""
+        with self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS tasks ("
+                "id TEXT PRIMARY KEY, parent_id TEXT, title TEXT, status TEXT, priority TEXT, "
+                "due_date TEXT, created_at TEXT, author TEXT, description TEXT, tags TEXT)"
+            )
+            # Subtree deletes walk parent_id
+            self.conn.execute("CREATE INDEX IF NOT EXISTS tasks_parent_id ON tasks (parent_id)")
+
+    def _import_json(self, filepath: str):
+        """
+        Copies the tasks of a JSON task file into a new, empty database.
+        The import is recorded in the database's user_version, so it runs at
+        most once; emptying the database later doesn't bring the tasks back.
+        """
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] >= _JSON_IMPORTED:
+            return
+        data = None
+        if not self.conn.execute("SELECT 1 FROM tasks LIMIT 1").fetchone():
+            try:
+                with open(filepath, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError):
+                pass
+        with self.conn:
+            if isinstance(data, list):
+                self.conn.executemany(_UPSERT_SQL, [_row_from_dict(d) for d in data])
+            self.conn.execute(f"PRAGMA user_version = {_JSON_IMPORTED}")
+
+    def load(self) -> List[Dict[str, Any]]:
+        """
+        Loads all tasks from the database.
+        
+        Returns:
+            A list of dictionaries, where each dictionary represents a task.
+        """
+        tasks = []
+        for row in self.conn.execute(_SELECT_SQL):
+            task_dict = dict(zip(_COLUMNS, row))
+            task_dict['tags'] = json.loads(task_dict['tags']) if task_dict['tags'] else []
+            tasks.append(task_decoder(task_dict))
+        return tasks
+
+    def upsert(self, tasks: Iterable[Task]):
+        """
+        Inserts or updates the rows of the given tasks.
+        
+        Args:
+            tasks: The Task objects that were added or changed.
+        """
+        rows = [_row_from_dict(self._encoder.default(t)) for t in tasks]
+        if not rows:
+            return
+        with self.conn:
+            self.conn.executemany(_UPSERT_SQL, rows)
+
+    def delete(self, task_ids: Iterable[str]):
+        """
+        Deletes the rows of the given task IDs and of any sub-tasks under them.
+        
+        Args:
+            task_ids: The IDs of the tasks that were deleted.
+        """
+        rows = [(task_id,) for task_id in task_ids]
+        if not rows:
+            return
+        with self.conn:
+            self.conn.executemany(_DELETE_SUBTREE_SQL, rows)
+
+    def save(self, tasks: List[Task]):
+        """
+        Replaces the whole table with the given tasks, in a single transaction
+        so a failure part-way leaves the previous contents in place.
+        
+        Args:
+            tasks: A list of Task objects to be saved.
+        """
+        rows = [_row_from_dict(self._encoder.default(t)) for t in tasks]
+        with self.conn:
+            self.conn.execute("DELETE FROM tasks")
+            self.conn.executemany(_UPSERT_SQL, rows)
+
+    def close(self):
+        """Closes the database connection."""
+        self.conn.close()
\ No newline at end of file
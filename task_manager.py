@@ -7,11 +7,17 @@
 # storage.
 #
 
+import sys
 import uuid
+import heapq
+import bisect
 import datetime
+import operator
+import threading
+from contextlib import contextmanager
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Callable
 
 # Using Enum for controlled vocabulary for status and priority.
 class Status(str, Enum):
@@ -27,7 +33,15 @@ class Priority(str, Enum):
     LOW = "C"
     NONE = "D" # Using D for None to allow sorting
 
-@dataclass
+# Tasks are numerous and never grow ad-hoc attributes, so drop the per-instance
+# __dict__ where dataclasses support it (Python 3.10+).
+_DATACLASS_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+# Changes are written to storage at most this many seconds after they happen,
+# so a burst of edits costs a single write.
+FLUSH_DELAY = 0.25
+
+@dataclass(**_DATACLASS_SLOTS)
 class Task:
     """
     Represents a single task or note.
@@ -44,6 +58,9 @@ class Task:
         children: A list of sub-tasks for creating a tree structure.
         parent_id: The ID of the parent task, if it's a sub-task.
         created_at: The timestamp when the task was created.
+        version: Bumped on every update so views can cache per-task rendering.
+                 It is not persisted.
+        tags_display: The tags pre-joined as " #tag1 #tag2" (empty without tags).
     """
     title: str
     id: str = field(default_factory=lambda: str(uuid.uuid4()))
@@ -56,6 +73,83 @@ class Task:
     children: List['Task'] = field(default_factory=list)
     parent_id: Optional[str] = None
     created_at: datetime.datetime = field(default_factory=datetime.datetime.now)
+    version: int = field(default=0, compare=False, repr=False)
+    # Kept in step with tags by __post_init__, _from_storage_tuple and update_task
+    _tags_str: str = field(default="", init=False, compare=False, repr=False)
+
+    def __post_init__(self):
+        self._tags_str = _join_tags(self.tags)
+
+    @property
+    def tags_display(self) -> str:
+        """The tags formatted for display, e.g. " #work #home"."""
+        return self._tags_str
+
+    @classmethod
+    def _from_storage(cls, data: Dict[str, Any]) -> 'Task':
+        """
+        Builds a Task from a decoded storage record, bypassing __init__.
+        Storage output is trusted, so this skips the keyword handling and
+        default factories of the generated constructor.
+        """
+        try:
+            values = _STORAGE_FIELDS(data)
+        except KeyError:
+            # Records written by older versions may lack some fields
+            values = tuple(data.get(key) for key in _STORAGE_KEYS)
+        return cls._from_storage_tuple(values)
+
+    @classmethod
+    def _from_storage_tuple(cls, values: tuple) -> 'Task':
+        """Builds a Task from a tuple of storage fields in _STORAGE_KEYS order."""
+        title, task_id, description, author, status, priority, due_date, tags, parent_id, created_at = values
+        self = object.__new__(cls)
+        self.title = title
+        self.id = task_id
+        self.description = description or ""
+        self.author = author
+        self.status = status or Status.TODO
+        self.priority = priority or Priority.NONE
+        # Storage normally hands over datetimes already; parse any raw strings
+        self.due_date = datetime.datetime.fromisoformat(due_date) if isinstance(due_date, str) else due_date
+        self.tags = tags or []
+        self._tags_str = _join_tags(self.tags)
+        # Stale children data is never trusted; the tree is rebuilt on load
+        self.children = []
+        self.parent_id = parent_id
+        if isinstance(created_at, str):
+            created_at = datetime.datetime.fromisoformat(created_at)
+        self.created_at = created_at or datetime.datetime.now()
+        self.version = 0
+        return self
+
+# The stored Task fields, in the order Task._from_storage_tuple expects them
+_STORAGE_KEYS = ('title', 'id', 'description', 'author', 'status', 'priority',
+                 'due_date', 'tags', 'parent_id', 'created_at')
+_STORAGE_FIELDS = operator.itemgetter(*_STORAGE_KEYS)
+
+def _tree_order(task: Task) -> tuple:
+    """Sort key for siblings in the task tree: priority first, then age."""
+    return (task.priority.value, task.created_at)
+
+def _join_tags(tags: List[str]) -> str:
+    """Formats tags the way task labels show them: " #tag1 #tag2"."""
+    return ' #' + ' #'.join(tags) if tags else ""
+
+def _sorted_remove(entries: List[tuple], entry: tuple):
+    """Removes an entry from a sorted list, if it is there."""
+    idx = bisect.bisect_left(entries, entry)
+    if idx < len(entries) and entries[idx] == entry:
+        del entries[idx]
+
+def _insert_child(children: List[Task], task: Task):
+    """Inserts a task into a children list, keeping it in tree order."""
+    key = _tree_order(task)
+    if not children or _tree_order(children[-1]) <= key:
+        # The common case: a brand-new task sorts last
+        children.append(task)
+    else:
+        children.insert(bisect.bisect_right([_tree_order(c) for c in children], key), task)
 
 class TaskManager:
     """
@@ -67,42 +161,219 @@ class TaskManager:
         Initializes the TaskManager with a storage backend.
         
         Args:
-            storage: An instance of a storage class (e.g., JsonStorage)
-                     that has load() and save() methods.
+            storage: An instance of a storage class (e.g., SqliteStorage)
+                     that has load() and save() methods. If it also has
+                     upsert() and delete(), only changed tasks are written.
         """
         self.storage = storage
         # Tasks are stored in a dictionary for quick O(1) lookups by ID.
         self.tasks: Dict[str, Task] = {}
+        # Bumped on every change so callers can cache anything derived from the tasks
+        self.version = 0
+        # Top-level tasks, kept in tree order as tasks are added, moved and deleted
+        self._roots: List[Task] = []
+        # Min-heap of (due_date, id) for open tasks with a due date. Entries go
+        # stale when a task changes; they are re-checked when popped.
+        self._due_heap: List[tuple] = []
+        # Every task with a due date as (due_date, id), kept sorted for get_all_tasks_flat
+        self._by_due: List[tuple] = []
+        self._flat_cache = (None, -1)
+        # Open tasks with a due date as (due_date, priority, id), kept sorted for due_tasks
+        self._due_index: List[tuple] = []
+        self._due_tasks_cache = (None, -1)
+        # IDs changed or deleted since the last flush, and the pending flush
+        self._dirty = set()
+        self._deleted = set()
+        self._flush_timer: Optional[threading.Timer] = None
+        # _lock guards the pending sets and the timer and is only held briefly;
+        # _write_lock keeps flushes from overlapping, so writes land in order
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        # Change listeners, and the changes held back while inside batch()
+        self._listeners: List[Callable[[Dict[str, str]], None]] = []
+        self._batch_depth = 0
+        self._batch_ids: Dict[str, str] = {}
         self.load_tasks()
 
     def load_tasks(self):
         """Loads tasks from the storage backend and organizes them into a tree."""
         all_tasks_data = self.storage.load()
-        temp_tasks = {data['id']: Task(**data) for data in all_tasks_data}
         
-        # Clear current state
-        self.tasks = {}
-        top_level_tasks = []
+        # Build the tasks straight into the lookup dict
+        self.tasks = tasks = {}
+        from_storage = Task._from_storage
+        for data in all_tasks_data:
+            task = from_storage(data)
+            tasks[task.id] = task
 
         # Reconstruct the tree structure from parent_id references
-        for task_id, task in temp_tasks.items():
-            # Clear any stale children data from the stored file
-            task.children = []
-            if task.parent_id and task.parent_id in temp_tasks:
-                parent = temp_tasks[task.parent_id]
+        self._roots = roots = []
+        for task in tasks.values():
+            parent = tasks.get(task.parent_id) if task.parent_id else None
+            if parent:
                 parent.children.append(task)
             else:
                 # If no parent, it's a top-level task
                 task.parent_id = None # Ensure parent_id is clean
-                top_level_tasks.append(task)
+                roots.append(task)
+
+        # Children and roots are kept in tree order from here on, so sort them once
+        roots.sort(key=_tree_order)
+        for task in tasks.values():
+            if len(task.children) > 1:
+                task.children.sort(key=_tree_order)
+
+        self._due_heap = [(t.due_date, t.id) for t in tasks.values() if t.due_date and t.status != Status.DONE]
+        heapq.heapify(self._due_heap)
+        self._by_due = sorted((t.due_date, t.id) for t in tasks.values() if t.due_date)
+        self._due_index = sorted(
+            (t.due_date, t.priority.value, t.id) for t in tasks.values() if t.due_date and t.status != Status.DONE
+        )
+
+    def _push_due(self, task: Task):
+        """Adds an open task with a due date to the due-date heap."""
+        if task.due_date and task.status != Status.DONE:
+            heapq.heappush(self._due_heap, (task.due_date, task.id))
+
+    def _index_due(self, task: Task):
+        """Adds a task to the sorted due-date lists it belongs in."""
+        if task.due_date:
+            bisect.insort(self._by_due, (task.due_date, task.id))
+            if task.status != Status.DONE:
+                bisect.insort(self._due_index, (task.due_date, task.priority.value, task.id))
+
+    def _unindex_due(self, task: Task):
+        """Removes a task from the sorted due-date lists, using its current fields."""
+        if task.due_date:
+            _sorted_remove(self._by_due, (task.due_date, task.id))
+            _sorted_remove(self._due_index, (task.due_date, task.priority.value, task.id))
+
+    def pop_due_tasks(self, now: datetime.datetime) -> List[Task]:
+        """
+        Removes and returns the open tasks whose due date is at or before `now`.
+        Each due date is only returned once; changing it queues the task again.
+        """
+        due = []
+        seen = set()
+        heap = self._due_heap
+        while heap and heap[0][0] <= now:
+            due_date, task_id = heapq.heappop(heap)
+            task = self.tasks.get(task_id)
+            # Skip entries left behind by deleted, rescheduled or finished tasks,
+            # and the duplicate left when a task is reopened with the same due date
+            if task and task.due_date == due_date and task.status != Status.DONE and task_id not in seen:
+                seen.add(task_id)
+                due.append(task)
+        return due
+
+    def subscribe(self, callback: Callable[[Dict[str, str]], None]):
+        """
+        Registers a callback for task changes.
+        
+        Args:
+            callback: Called with a dict mapping each changed task ID to
+                      "add", "update" or "delete". A delete covers the
+                      task's whole subtree.
+        """
+        self._listeners.append(callback)
+
+    def unsubscribe(self, callback: Callable[[Dict[str, str]], None]):
+        """Removes a callback registered with subscribe()."""
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    @contextmanager
+    def batch(self):
+        """
+        Groups several changes into a single notification, e.g. for bulk edits:
+
+            with task_manager.batch():
+                for task_id in ids:
+                    task_manager.update_task(task_id, status=Status.DONE)
+        """
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0 and self._batch_ids:
+                changes, self._batch_ids = self._batch_ids, {}
+                self._notify(changes)
 
-        # The self.tasks dict should contain all tasks, for easy lookup
-        self.tasks = temp_tasks
+    def _record_change(self, task_id: str, kind: str):
+        """Notifies listeners of a change now, or once the outermost batch ends."""
+        if self._batch_depth == 0:
+            self._notify({task_id: kind})
+        elif kind != "update" or task_id not in self._batch_ids:
+            # An update adds nothing to a pending add or delete
+            self._batch_ids[task_id] = kind
 
-    def save_tasks(self):
-        """Saves all tasks to the storage backend."""
-        # We save a flat list of all tasks; the tree is reconstructed on load.
-        self.storage.save(list(self.tasks.values()))
+    def _notify(self, changes: Dict[str, str]):
+        """Calls every listener with the given changes."""
+        for callback in list(self._listeners):
+            callback(changes)
+
+    def _mark_dirty(self, task_id: str):
+        """Records that a task was added or changed and schedules a flush."""
+        with self._lock:
+            self._dirty.add(task_id)
+            self._deleted.discard(task_id)
+        self._schedule_flush()
+
+    def _mark_deleted(self, task_ids: List[str]):
+        """Records that tasks were deleted and schedules a flush."""
+        with self._lock:
+            self._deleted.update(task_ids)
+            self._dirty.difference_update(task_ids)
+        self._schedule_flush()
+
+    def _schedule_flush(self):
+        """Starts the flush timer unless one is already pending."""
+        with self._lock:
+            if self._flush_timer is None:
+                self._flush_timer = threading.Timer(FLUSH_DELAY, self.flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+
+    def flush(self):
+        """
+        Writes all pending changes to the storage backend.
+
+        The pending changes are taken under _lock, but the write itself runs
+        outside it, so edits on the UI thread never wait for the disk. A task
+        edited mid-write is marked dirty again and goes out with the next flush.
+        """
+        row_based = hasattr(self.storage, 'upsert')
+        with self._write_lock:
+            with self._lock:
+                if self._flush_timer is not None:
+                    self._flush_timer.cancel()
+                    self._flush_timer = None
+                if not self._dirty and not self._deleted:
+                    return
+                dirty, deleted = self._dirty, self._deleted
+                self._dirty, self._deleted = set(), set()
+                if row_based:
+                    # Row-based backends only need the tasks that changed
+                    changed = [self.tasks.get(i) for i in dirty]
+                    tasks = [t for t in changed if t is not None]
+                else:
+                    # We save a flat list of all tasks; the tree is reconstructed on load.
+                    tasks = list(self.tasks.values())
+            try:
+                if row_based:
+                    self.storage.upsert(tasks)
+                    self.storage.delete(deleted)
+                else:
+                    self.storage.save(tasks)
+            except Exception:
+                # Put the changes back for the next flush, unless newer ones replaced them
+                with self._lock:
+                    retry_dirty = dirty - self._deleted
+                    retry_deleted = deleted - self._dirty
+                    self._dirty |= retry_dirty
+                    self._deleted |= retry_deleted
+                raise
 
     def add_task(
         self,
@@ -124,11 +395,15 @@ class TaskManager:
         new_task = Task(title=title, parent_id=parent_id, **kwargs)
         self.tasks[new_task.id] = new_task
         
-        if parent_id and parent_id in self.tasks:
-            parent_task = self.tasks[parent_id]
-            parent_task.children.append(new_task)
+        siblings = self.siblings(new_task)
+        if siblings is not None:
+            _insert_child(siblings, new_task)
             
-        self.save_tasks()
+        self._push_due(new_task)
+        self._index_due(new_task)
+        self.version += 1
+        self._mark_dirty(new_task.id)
+        self._record_change(new_task.id, "add")
         return new_task
 
     def get_task(self, task_id: str) -> Optional[Task]:
@@ -142,18 +417,53 @@ class TaskManager:
         Args:
             task_id: The ID of the task to update.
             **kwargs: The attributes to update (e.g., title="New Title").
+
+        Raises:
+            ValueError: If the new parent_id is the task itself or one of its sub-tasks.
         """
         task = self.get_task(task_id)
         if task:
+            if kwargs.get('parent_id'):
+                # Moving a task under its own subtree would cut it off from the tree
+                ancestor_id = kwargs['parent_id']
+                while ancestor_id:
+                    if ancestor_id == task_id:
+                        raise ValueError(f"Task {task_id} can't be moved under itself or its sub-tasks")
+                    ancestor = self.tasks.get(ancestor_id)
+                    ancestor_id = ancestor.parent_id if ancestor else None
+            # The due-date indexes are keyed on these fields
+            reindex = 'due_date' in kwargs or 'status' in kwargs or 'priority' in kwargs
+            if reindex:
+                self._unindex_due(task)
+            old_due_key = (task.due_date, task.status)
+            # The task's place in the tree depends on these
+            move = 'parent_id' in kwargs or 'priority' in kwargs
+            if move:
+                old_siblings = self.siblings(task)
             for key, value in kwargs.items():
                 if hasattr(task, key):
                     setattr(task, key, value)
-            self.save_tasks()
+            if 'tags' in kwargs:
+                task._tags_str = _join_tags(task.tags)
+            if move:
+                if old_siblings is not None:
+                    old_siblings.remove(task)
+                new_siblings = self.siblings(task)
+                if new_siblings is not None:
+                    _insert_child(new_siblings, task)
+            task.version += 1
+            if reindex:
+                self._index_due(task)
+            # Only a new due date or status needs a new heap entry
+            if (task.due_date, task.status) != old_due_key:
+                self._push_due(task)
+            self.version += 1
+            self._mark_dirty(task_id)
+            self._record_change(task_id, "update")
 
     def delete_task(self, task_id: str):
         """
-
-        Deletes a task and all its sub-tasks recursively.
+        Deletes a task and all its sub-tasks.
         
         Args:
             task_id: The ID of the task to delete.
@@ -162,34 +472,65 @@ class TaskManager:
         if not task_to_delete:
             return
 
-        # Recursively delete all children first
-        for child in list(task_to_delete.children):
-            self.delete_task(child.id)
+        # Collect the whole subtree with an explicit stack
+        to_delete = []
+        stack = [task_to_delete]
+        while stack:
+            task = stack.pop()
+            to_delete.append(task.id)
+            stack.extend(task.children)
 
-        # Remove from parent's children list
-        if task_to_delete.parent_id and task_to_delete.parent_id in self.tasks:
-            parent = self.tasks[task_to_delete.parent_id]
-            parent.children = [c for c in parent.children if c.id != task_id]
+        # Only the subtree root is listed in a surviving parent's children (or the roots)
+        siblings = self.siblings(task_to_delete)
+        if siblings is not None:
+            siblings.remove(task_to_delete)
 
         # Remove from the main task dictionary
-        if task_id in self.tasks:
-            del self.tasks[task_id]
+        for tid in to_delete:
+            self._unindex_due(self.tasks.pop(tid))
         
-        self.save_tasks()
+        self.version += 1
+        self._mark_deleted(to_delete)
+        self._record_change(task_id, "delete")
+
+    def siblings(self, task: Task) -> Optional[List[Task]]:
+        """
+        Returns the list a task is kept in, in tree order: its parent's children,
+        or the roots for a top-level task. None if its parent is unknown.
+        The list is maintained as tasks change; callers must not modify it.
+        """
+        if not task.parent_id:
+            return self._roots
+        parent = self.tasks.get(task.parent_id)
+        return parent.children if parent else None
 
     def get_task_tree(self) -> List[Task]:
         """
         Returns a list of top-level tasks (tasks without a parent).
         The full tree can be traversed from these tasks via their `children` attribute.
+        The list is maintained as tasks change; callers must not modify it.
         """
-        return sorted(
-            [task for task in self.tasks.values() if not task.parent_id],
-            key=lambda t: (t.priority.value, t.created_at)
-        )
+        return self._roots
 
     def get_all_tasks_flat(self) -> List[Task]:
-        """Returns a flat list of all tasks, sorted by due date."""
-        return sorted(
-            [task for task in self.tasks.values() if task.due_date],
-            key=lambda t: t.due_date if t.due_date else datetime.datetime.max
-        )
\ No newline at end of file
+        """
+        Returns a flat list of all tasks that have a due date, sorted by it.
+        The list is cached until the tasks change; callers must not modify it.
+        """
+        flat, version = self._flat_cache
+        if version != self.version:
+            flat = [self.tasks[task_id] for _, task_id in self._by_due]
+            self._flat_cache = (flat, self.version)
+        return flat
+
+    def due_tasks(self) -> List[Task]:
+        """
+        Returns the tasks that have a due date and aren't done, sorted by
+        due date and then priority.
+        The list is cached until the tasks change; callers must not modify it.
+        """
+        due, version = self._due_tasks_cache
+        if version != self.version:
+            due = [self.tasks[task_id] for _, _, task_id in self._due_index]
+            self._due_tasks_cache = (due, self.version)
+        return due
\ No newline at end of file
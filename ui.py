@@ -1,11 +1,12 @@
 # ui.py
+import os
 import curses
 import textwrap
 import webbrowser
 import http.server
 import socketserver
 import threading
-import time
+from collections import OrderedDict
 
 from task_manager import Task, Status, Priority
 from web_graph import generate_web_graph
@@ -23,6 +24,9 @@ THEME_COLORS = {
     'priority_d_fg': curses.COLOR_WHITE, 'priority_d_bg': -1,
 }
 
+# Number of wrapped task descriptions kept for the detail pane
+WRAP_CACHE_SIZE = 64
+
 # --- NEW: Global variables to manage the server state ---
 SERVER_THREAD = None
 HTTPD_SERVER = None
@@ -58,11 +62,8 @@ class TextEditor:
         curses.curs_set(1); self.win.keypad(True)
         while True:
             self.draw();
-            try:
-                key = self.win.getch()
-            except curses.error:
-                time.sleep(0.01)
-                continue
+            # The editor window is in blocking mode, so this waits for a key
+            key = self.win.getch()
             if key == 24: return None
             if key == 19: return "\n".join(self.lines)
             if key == curses.KEY_RESIZE:
@@ -104,12 +105,23 @@ class TextEditor:
 
 
 class App:
+    ICON_DONE = "✔"
+    ICON_TODO = "○"
+
     def __init__(self, stdscr, task_manager, height, width):
         self.stdscr = stdscr; self.task_manager = task_manager; self.height, self.width = height, width
         self.running = True; self.theme = {}
         self.active_pane = 'list'
         self.list_scroll_offset = 0; self.detail_scroll_offset = 0; self.selected_index = 0
         self.planner_tasks = []
+        self._tree_cache = (None, -1) # (flattened tree, task_manager.version)
+        self._wrap_cache = OrderedDict() # (task id, width, version) -> wrapped description
+        self._last_fp = None # State fingerprint of the last drawn frame
+        self._rendered_rows = [] # (truncated line, is_done) per planner task
+        self._rows_key = None # (task_manager.version, list_width) of _rendered_rows
+        self.list_pad = None # Every planner row, painted once per _rows_key
+        self._pad_selected = -1 # Row currently painted with the selection color
+        self._graph_cache_key = None # (task_manager.version, central id) of the last index.html
 
     def setup_colors(self):
         self.theme = {}
@@ -130,15 +142,37 @@ class App:
             except curses.error:
                 pass
 
+        # Resolve the attributes the draw path uses once, instead of per frame
+        self.c_text = self._get_color('text')
+        self.c_border = self._get_color('border')
+        self.c_title = self._get_color('title')
+        self.c_title_bold = self._get_color('title', curses.A_BOLD)
+        self.c_selected = self._get_color('selected')
+        self.c_dim = self._get_color('dim', curses.A_DIM)
+        self.c_prio = {p: self._get_color(f'priority_{p.value.lower()}') for p in Priority}
+
     def _get_color(self, name, attr=curses.A_NORMAL):
         return self.theme.get(name, curses.A_NORMAL) | attr
 
+    def _state_fingerprint(self):
+        """Everything the main screen depends on; the frame is only redrawn when this changes."""
+        return (self.selected_index, self.list_scroll_offset, self.detail_scroll_offset, self.active_pane,
+                self.task_manager.version, self.height, self.width)
+
     def _handle_resize(self):
         self.height, self.width = self.stdscr.getmaxyx()
         self.stdscr.clear()
         self.stdscr.refresh()
         self.main_win.resize(self.height, self.width)
         self.main_win.mvwin(0, 0)
+        self._build_panes()
+        self._last_fp = None # The screen was cleared, so repaint even if nothing else changed
+
+    def _build_panes(self):
+        """Create the list and detail sub-windows for the current size; they're reused every frame."""
+        pane_width = self.width // 2
+        self.list_pane = self.main_win.derwin(self.height - 2, pane_width - 1, 1, 1)
+        self.detail_pane = self.main_win.derwin(self.height - 2, self.width - pane_width - 2, 1, pane_width)
 
     # --- NEW: Method to shut down the server gracefully ---
     def _shutdown_server(self):
@@ -158,15 +192,16 @@ class App:
         self.setup_colors()
         self.main_win = curses.newwin(self.height, self.width, 0, 0)
         self.main_win.keypad(True)
-        self.main_win.nodelay(True)
+        # Block in getch for up to 100 ms instead of polling; -1 means no key
+        self.main_win.timeout(100)
+        self._build_panes()
 
         while self.running:
-            self.draw()
-            try:
-                key = self.main_win.getch()
-            except curses.error:
-                time.sleep(0.01)
-                key = -1
+            # Skip the repaint while idle; nothing on screen could have changed
+            if self._state_fingerprint() != self._last_fp:
+                self.draw()
+                self._last_fp = self._state_fingerprint()
+            key = self.main_win.getch()
 
             if key != -1:
                 if key == curses.KEY_RESIZE:
@@ -190,6 +225,7 @@ class App:
         input_str = input_win.getstr().decode('utf-8')
 
         curses.noecho(); curses.curs_set(0)
+        self._last_fp = None # The popup covered the main window
         return input_str
 
     def run_editor(self, initial_text):
@@ -205,6 +241,7 @@ class App:
         
         curses.curs_set(0)
         self.stdscr.clear(); self.stdscr.refresh()
+        self._last_fp = None # The editor covered the main window
         return result
 
     def handle_input(self, key):
@@ -243,51 +280,77 @@ class App:
                 if new_title: self.task_manager.update_task(task.id, title=new_title)
         elif key == ord('g'):
             if num_tasks > 0:
-                generate_web_graph(self.task_manager, central_node_id=self.planner_tasks[self.selected_index]['id'])
+                central_id = self.planner_tasks[self.selected_index]['id']
+                # Reuse the page from the last 'g' if nothing has changed since
+                graph_key = (self.task_manager.version, central_id)
+                if graph_key != self._graph_cache_key or not os.path.exists('index.html'):
+                    generate_web_graph(self.task_manager, central_node_id=central_id)
+                    self._graph_cache_key = graph_key
                 start_server(); webbrowser.open('http://localhost:8000/index.html')
 
     def draw(self):
         self.main_win.erase()
-        self.main_win.attron(self._get_color('border')); self.main_win.box(); self.main_win.attroff(self._get_color('border'))
-        self.draw_header(); self.draw_footer(); self.draw_planner_view(); self.main_win.refresh()
+        self.main_win.attron(self.c_border); self.main_win.box(); self.main_win.attroff(self.c_border)
+        self.draw_header(); self.draw_footer()
+        # Stage the windows back to front and push them in one update, so the
+        # parent window can't paint over the task list pad
+        self.main_win.noutrefresh(); self.draw_planner_view(); curses.doupdate()
 
-    def draw_header(self): self.main_win.addstr(0, 2, " NeuroPlan ", self._get_color('title', curses.A_BOLD))
+    def draw_header(self): self.main_win.addstr(0, 2, " NeuroPlan ", self.c_title_bold)
     def draw_footer(self):
         footer_text = " (q)uit (Tab)pane (j/k)scroll (a)dd (d)esc (x)del (g)raph "
-        self.main_win.addstr(self.height - 1, 2, footer_text[:self.width - 3], self._get_color('dim', curses.A_DIM))
+        self.main_win.addstr(self.height - 1, 2, footer_text[:self.width - 3], self.c_dim)
     
+    def _wrap_description(self, task, width):
+        """Wrap a task's description, reusing the result until the tasks or width change."""
+        key = (task.id, width, self.task_manager.version)
+        lines = self._wrap_cache.get(key)
+        if lines is None:
+            lines = textwrap.wrap(task.description, width)
+            self._wrap_cache[key] = lines
+            if len(self._wrap_cache) > WRAP_CACHE_SIZE: self._wrap_cache.popitem(last=False)
+        else:
+            self._wrap_cache.move_to_end(key)
+        return lines
+
     def _flatten_tasks(self, tasks, indent=0):
+        # Roots and children are already in tree order (priority, then age) in the TaskManager.
+        # Walk depth-first with an explicit stack so deep trees can't hit the recursion limit.
         flat_list = []
-        for task in sorted(tasks, key=lambda t: t.created_at):
-            flat_list.append({"task": task, "indent": indent, "id": task.id})
-            if task.children: flat_list.extend(self._flatten_tasks(task.children, indent + 1))
+        stack = [(task, indent) for task in reversed(tasks)]
+        while stack:
+            task, depth = stack.pop()
+            flat_list.append({"task": task, "indent": depth, "id": task.id})
+            stack.extend((child, depth + 1) for child in reversed(task.children))
         return flat_list
 
 # In ui.py
 
     def draw_planner_view(self):
-        pane_width = self.width // 2
-        list_pane = self.main_win.derwin(self.height - 2, pane_width - 1, 1, 1)
-        detail_pane = self.main_win.derwin(self.height - 2, self.width - pane_width - 2, 1, pane_width)
+        list_pane, detail_pane = self.list_pane, self.detail_pane
+        list_pane.erase(); detail_pane.erase()
         
         # --- MODIFIED: Use more distinct colors for active/inactive panes ---
         is_list_active = self.active_pane == 'list'
-        list_border_color = self._get_color('title') if is_list_active else self._get_color('border')
-        detail_border_color = self._get_color('title') if not is_list_active else self._get_color('border')
+        list_border_color = self.c_title if is_list_active else self.c_border
+        detail_border_color = self.c_title if not is_list_active else self.c_border
         # -------------------------------------------------------------------
 
         list_pane.attron(list_border_color); list_pane.box(); list_pane.attroff(list_border_color)
         detail_pane.attron(detail_border_color); detail_pane.box(); detail_pane.attroff(detail_border_color)
 
         # --- NEW: Add titles to the panes ---
-        list_title_color = self._get_color('title', curses.A_BOLD) if is_list_active else self._get_color('text')
-        detail_title_color = self._get_color('title', curses.A_BOLD) if not is_list_active else self._get_color('text')
+        list_title_color = self.c_title_bold if is_list_active else self.c_text
+        detail_title_color = self.c_title_bold if not is_list_active else self.c_text
         
         list_pane.addstr(0, 2, " Tasks ", list_title_color)
         detail_pane.addstr(0, 2, " Details ", detail_title_color)
         # ------------------------------------
         
-        self.planner_tasks = self._flatten_tasks(self.task_manager.get_task_tree())
+        # Only re-flatten the tree when the tasks have changed
+        if self._tree_cache[1] != self.task_manager.version:
+            self._tree_cache = (self._flatten_tasks(self.task_manager.get_task_tree()), self.task_manager.version)
+        self.planner_tasks = self._tree_cache[0]
         if self.selected_index >= len(self.planner_tasks): self.selected_index = max(0, len(self.planner_tasks) - 1)
         
         list_height, list_width = list_pane.getmaxyx()
@@ -296,40 +359,57 @@ class App:
         if self.selected_index < self.list_scroll_offset: self.list_scroll_offset = self.selected_index
         if self.selected_index >= self.list_scroll_offset + list_height: self.list_scroll_offset = self.selected_index - list_height + 1
         
-        for i in range(list_height):
-            draw_idx = self.list_scroll_offset + i
-            if draw_idx < len(self.planner_tasks):
-                item = self.planner_tasks[draw_idx]
+        # Build the row strings and paint them all into a pad once per change
+        # of tasks or width; scrolling then only moves the pad's viewport
+        pad_width = max(1, list_width - 4)
+        sel_c, dim_c, text_c = self.c_selected, self.c_dim, self.c_text
+        rows_key = (self.task_manager.version, list_width)
+        if self._rows_key != rows_key:
+            self._rendered_rows = []
+            for item in self.planner_tasks:
+                is_done = item['task'].status == Status.DONE
                 prefix = '  ' * item['indent']
-                icon = "✔" if item['task'].status == Status.DONE else "○"
+                icon = self.ICON_DONE if is_done else self.ICON_TODO
                 line = f"{prefix}{icon} {item['task'].title}"
-                line = line[:list_width - 4] # Truncate
-                
-                color = self._get_color('selected') if draw_idx == self.selected_index else (self._get_color('dim', curses.A_DIM) if item['task'].status == Status.DONE else self._get_color('text'))
-                list_pane.addstr(i + 1, 2, line, color)
+                self._rendered_rows.append((line[:list_width - 4], is_done)) # Truncate
+            # One spare column so a full-width line on the last row can't push the cursor off the pad
+            self.list_pad = curses.newpad(max(1, len(self._rendered_rows)), pad_width + 1)
+            for row, (line, is_done) in enumerate(self._rendered_rows):
+                self.list_pad.addstr(row, 0, line, dim_c if is_done else text_c)
+            self._pad_selected = -1
+            self._rows_key = rows_key
+        
+        # Move the selection highlight, repainting just the two rows involved
+        if self._pad_selected != self.selected_index:
+            if 0 <= self._pad_selected < len(self._rendered_rows):
+                line, is_done = self._rendered_rows[self._pad_selected]
+                self.list_pad.addstr(self._pad_selected, 0, line, dim_c if is_done else text_c)
+            if self.selected_index < len(self._rendered_rows):
+                self.list_pad.addstr(self.selected_index, 0, self._rendered_rows[self.selected_index][0], sel_c)
+            self._pad_selected = self.selected_index
 
         if self.planner_tasks:
             task = self.planner_tasks[self.selected_index]['task']
             y, x = 1, 2
             h, w = detail_pane.getmaxyx()
             
+            text_col = self.c_text
             all_lines = []
-            all_lines.append( (task.title, self._get_color('title', curses.A_BOLD)) )
-            all_lines.append( ("", self._get_color('text')) )
-            p_key = f'priority_{task.priority.value.lower()}'
-            p_color = self._get_color(p_key)
+            all_lines.append( (task.title, self.c_title_bold) )
+            all_lines.append( ("", text_col) )
+            p_color = self.c_prio[task.priority]
             metadata = [
-                ("ID:", task.id, self._get_color('text')),
-                ("Author:", getattr(task, 'author', 'N/A'), self._get_color('text')),
-                ("Status:", task.status.value, self._get_color('text')),
+                ("ID:", task.id, text_col),
+                ("Author:", task.author or 'N/A', text_col),
+                ("Status:", task.status.value, text_col),
                 ("Priority:", task.priority.value, p_color),
-                ("Created:", task.created_at.strftime('%Y-%m-%d %H:%M'), self._get_color('text'))
+                ("Created:", task.created_at.strftime('%Y-%m-%d %H:%M'), text_col)
             ]
             all_lines.extend(metadata)
-            all_lines.append( ("", self._get_color('text')) )
-            all_lines.append( ("Description", self._get_color('title')) )
-            desc_lines = textwrap.wrap(task.description, w - 4)
-            for line in desc_lines: all_lines.append((line, self._get_color('text')))
+            all_lines.append( ("", text_col) )
+            all_lines.append( ("Description", self.c_title) )
+            desc_lines = self._wrap_description(task, w - 4)
+            for line in desc_lines: all_lines.append((line, text_col))
             
             if len(all_lines) > h - 2:
                 if self.detail_scroll_offset > len(all_lines) - (h - 2): self.detail_scroll_offset = len(all_lines) - (h - 2)
@@ -341,10 +421,13 @@ class App:
                     line_data = all_lines[draw_idx]
                     if len(line_data) == 3:
                         label, value, color = line_data
-                        detail_pane.addstr(y + i, x, f"{label:<10}", self._get_color('dim', curses.A_DIM))
+                        detail_pane.addstr(y + i, x, f"{label:<10}", self.c_dim)
                         detail_pane.addstr(str(value), color)
                     else:
                         line, color = line_data
                         detail_pane.addstr(y + i, x, line, color)
         
-        list_pane.refresh(); detail_pane.refresh()
\ No newline at end of file
+        list_pane.noutrefresh(); detail_pane.noutrefresh()
+        if list_height > 0:
+            top, left = list_pane.getbegyx()
+            self.list_pad.noutrefresh(self.list_scroll_offset, 0, top + 1, left + 2, top + list_height, left + 1 + pad_width)
\ No newline at end of file
@@ -8,7 +8,9 @@
 #
 
 import datetime
+import os
 import re
+from functools import partial
 from typing import Optional
 from textual.app import App, ComposeResult
 from textual.binding import Binding
@@ -21,12 +23,16 @@ from rich.panel import Panel
 from rich.style import Style
 
 # Local imports from other project files
-from storage import JsonStorage
+from storage import SqliteStorage
 from task_manager import TaskManager, Task, Status, Priority
 from keybindings import APP_BINDINGS, PLANNER_SCREEN_BINDINGS
 from graph import generate_ascii_graph
 from reminder import ReminderManager
 
+def _fmt_due(dt: datetime.datetime) -> str:
+    """Formats a due date as "YYYY-MM-DD HH:MM" without strftime's format parsing."""
+    return f"{dt.year:04d}-{dt.month:02d}-{dt.day:02d} {dt.hour:02d}:{dt.minute:02d}"
+
 # --- Custom Widgets ---
 
 class TaskTree(Tree):
@@ -35,6 +41,12 @@ class TaskTree(Tree):
     def __init__(self, task_manager: TaskManager, **kwargs):
         super().__init__("✅ Planner", **kwargs)
         self.task_manager = task_manager
+        # Tree node of every task shown, so single edits can touch just their node
+        self._task_nodes = {}
+        # Rendered label per task id, as (task.version, Text)
+        self._label_cache = {}
+        # IDs of the tasks whose children have been added to the tree
+        self._materialized = set()
         self.set_styles()
 
     def set_styles(self):
@@ -48,6 +60,11 @@ class TaskTree(Tree):
         if not task:
             return Text(node.label)
 
+        # Reuse the label until the task changes
+        cached = self._label_cache.get(task.id)
+        if cached is not None and cached[0] == task.version:
+            return cached[1]
+
         # Style based on status
         style = Style()
         icon = "○"
@@ -60,30 +77,149 @@ class TaskTree(Tree):
         # Priority marker
         priority_marker = f"[{task.priority.value}]" if task.priority != Priority.NONE else ""
 
-        # Compose label
-        label = Text()
-        label.append(f"{icon} ", style=style)
+        # Compose label in one go
+        parts = [(f"{icon} ", style)]
         if priority_marker:
-            label.append(f"{priority_marker} ", style="yellow")
-        label.append(task.title, style=style)
+            parts.append((f"{priority_marker} ", "yellow"))
+        parts.append((task.title, style))
         if task.tags:
-            label.append(f" #{' #'.join(task.tags)}", style="cyan dim")
+            parts.append((task.tags_display, "cyan dim"))
+        label = Text.assemble(*parts)
 
+        self._label_cache[task.id] = (task.version, label)
         return label
 
-    def _add_task_to_tree(self, task: Task, parent_node):
-        """Recursively add a task and its children to the tree."""
-        node = parent_node.add(task.title, data=task)
-        for child in sorted(task.children, key=lambda t: (t.priority.value, t.created_at)):
-            self._add_task_to_tree(child, node)
+    def _add_task_to_tree(self, task: Task, parent_node, before=None):
+        """
+        Add a single task to the tree, at the end or before the node `before`.
+        Its children are only added once the node is first expanded, so large
+        trees cost nothing until opened.
+        """
+        node = parent_node.add(task.title, data=task, before=before, allow_expand=bool(task.children))
+        self._task_nodes[task.id] = node
+        return node
+
+    def on_tree_node_expanded(self, event: Tree.NodeExpanded) -> None:
+        """Add the children of a task the first time its node is expanded."""
+        task: Task = event.node.data
+        if not task or task.id in self._materialized:
+            return
+        self._materialized.add(task.id)
+        # The TaskManager keeps children in tree order already
+        for child in task.children:
+            self._add_task_to_tree(child, event.node)
 
     def reload(self):
         """Clear and reload the tree from the TaskManager."""
         self.clear()
+        self._task_nodes = {}
+        self._label_cache = {}
+        self._materialized = set()
         task_tree = self.task_manager.get_task_tree()
         for task in task_tree:
             self._add_task_to_tree(task, self.root)
-        self.root.expand_all()
+        self.root.expand()
+
+    def apply_update(self, task_id: str, kind: str):
+        """
+        Update the tree for a single change instead of rebuilding it.
+
+        Args:
+            task_id: The ID of the task that changed.
+            kind: "add", "update" or "delete".
+        """
+        if kind == "delete":
+            self._label_cache.pop(task_id, None)
+            self._materialized.discard(task_id)
+            node = self._task_nodes.get(task_id)
+            if node is not None:
+                self._remove_node(node)
+            return
+
+        task = self.task_manager.get_task(task_id)
+        if not task:
+            return
+        if kind == "update":
+            node = self._task_nodes.get(task_id)
+            if node is None:
+                # Not shown yet, but a new parent may already be showing its children
+                self._insert_task(task, expand_parent=False)
+                return
+            node.data = task
+            parent_node = self._parent_node(task)
+            if node.parent is parent_node and self._next_node(node) is self._following_node(task, parent_node):
+                # Still in place: re-setting the label re-renders just this line
+                node.set_label(task.title)
+                return
+            # Its priority or parent changed, so move it to its new place
+            was_expanded = node.is_expanded
+            self._remove_node(node)
+            new_node = self._insert_task(task, expand_parent=False)
+            if new_node is not None and was_expanded:
+                new_node.expand()
+        elif kind == "add":
+            self._insert_task(task, expand_parent=True)
+
+    def _parent_node(self, task: Task):
+        """The node a task belongs under, or None if its parent isn't shown."""
+        return self._task_nodes.get(task.parent_id) if task.parent_id else self.root
+
+    def _following_node(self, task: Task, parent_node):
+        """
+        The node a task should be placed before: that of the first later
+        sibling (in TaskManager order) already shown under `parent_node`.
+        """
+        siblings = self.task_manager.siblings(task) or []
+        after = False
+        for sibling in siblings:
+            if sibling is task:
+                after = True
+            elif after:
+                node = self._task_nodes.get(sibling.id)
+                if node is not None and node.parent is parent_node:
+                    return node
+        return None
+
+    @staticmethod
+    def _next_node(node):
+        """The node after `node` among its parent's children, or None."""
+        children = node.parent.children
+        idx = children.index(node) + 1
+        return children[idx] if idx < len(children) else None
+
+    def _insert_task(self, task: Task, expand_parent: bool):
+        """
+        Show a task at its place among its siblings, if its parent is showing
+        its children. Returns the new node, or None if it wasn't added.
+        """
+        parent_node = self._parent_node(task)
+        if parent_node is None:
+            # An ancestor was never expanded; the task shows up once it is
+            return None
+        node = None
+        if parent_node is self.root or task.parent_id in self._materialized:
+            node = self._add_task_to_tree(task, parent_node, before=self._following_node(task, parent_node))
+        else:
+            # Expanding adds all of the parent's children, the new task included
+            parent_node.allow_expand = True
+        if expand_parent:
+            parent_node.expand()
+        return node
+
+    def _remove_node(self, node):
+        """Remove a task's node and forget the nodes of its whole subtree."""
+        stack = [node]
+        while stack:
+            child = stack.pop()
+            if child.data:
+                self._task_nodes.pop(child.data.id, None)
+                self._label_cache.pop(child.data.id, None)
+                self._materialized.discard(child.data.id)
+            stack.extend(child.children)
+        parent_node = node.parent
+        node.remove()
+        if parent_node is not None and parent_node.data:
+            parent_node.allow_expand = bool(parent_node.data.children)
 
 class TaskDetail(Static):
     """A widget to display the details of a selected task."""
@@ -91,16 +227,16 @@ class TaskDetail(Static):
     def update_content(self, task: Optional[Task]):
         """Update the display with the details of the given task."""
         if task:
-            content = Text()
-            content.append(f"ID: {task.id}\n", style="dim")
-            content.append(f"Status: {task.status.value}\n", style="bold")
-            content.append(f"Priority: {task.priority.value}\n", style="bold")
+            parts = [
+                (f"ID: {task.id}\n", "dim"),
+                (f"Status: {task.status.value}\nPriority: {task.priority.value}\n", "bold"),
+            ]
             if task.due_date:
-                content.append(f"Due: {task.due_date.strftime('%Y-%m-%d %H:%M')}\n")
+                parts.append(f"Due: {_fmt_due(task.due_date)}\n")
             if task.tags:
-                content.append(f"Tags: {' '.join(task.tags)}\n", style="cyan")
-            content.append("-" * 30)
-            content.append(f"\n{task.description}")
+                parts.append((f"Tags: {' '.join(task.tags)}\n", "cyan"))
+            parts.append(f"{'-' * 30}\n{task.description}")
+            content = Text.assemble(*parts)
             self.update(Panel(content, title=task.title, border_style="green"))
         else:
             self.update(Panel("Select a task to see details.", title="Details", border_style="dim"))
@@ -152,9 +288,37 @@ class PlannerScreen(Screen):
 
     def on_mount(self) -> None:
         """Load data when the screen is mounted."""
+        # Tree updates queued by actions, applied together shortly after
+        self._pending_tree_updates = {}
+        self._tree_update_timer = None
+        self.app.task_manager.subscribe(self._on_tasks_changed)
         self.task_tree.reload()
         self.task_tree.focus()
 
+    def on_unmount(self) -> None:
+        """Stop listening for task changes."""
+        self.app.task_manager.unsubscribe(self._on_tasks_changed)
+
+    def _on_tasks_changed(self, changes: dict) -> None:
+        """Queue tree updates for changes reported by the TaskManager."""
+        for task_id, kind in changes.items():
+            self._schedule_update(task_id, kind)
+
+    def _schedule_update(self, task_id: str, kind: str) -> None:
+        """Queue a tree update; a burst of actions within 50 ms is applied in one go."""
+        # An "update" of a task that is still waiting to be added or deleted adds nothing
+        if kind != "update" or task_id not in self._pending_tree_updates:
+            self._pending_tree_updates[task_id] = kind
+        if self._tree_update_timer is None:
+            self._tree_update_timer = self.set_timer(0.05, self._flush_updates)
+
+    def _flush_updates(self) -> None:
+        """Apply all queued tree updates."""
+        self._tree_update_timer = None
+        pending, self._pending_tree_updates = self._pending_tree_updates, {}
+        for task_id, kind in pending.items():
+            self.task_tree.apply_update(task_id, kind)
+
     def on_tree_node_selected(self, event: Tree.NodeSelected) -> None:
         """Update the detail view when a task is selected."""
         task: Optional[Task] = event.node.data
@@ -172,7 +336,6 @@ class PlannerScreen(Screen):
         def after_add(data: Optional[dict]):
             if data:
                 self.app.task_manager.add_task(**data)
-                self.task_tree.reload()
         self.app.push_screen(EditTaskScreen(parent_id=parent_id), after_add)
 
     def action_delete_task(self) -> None:
@@ -180,7 +343,6 @@ class PlannerScreen(Screen):
         task_id = self._get_selected_task_id()
         if task_id:
             self.app.task_manager.delete_task(task_id)
-            self.task_tree.reload()
             self.task_detail.update_content(None)
             self.app.notify(f"Task {task_id[:8]} deleted.", title="Deleted")
 
@@ -191,8 +353,8 @@ class PlannerScreen(Screen):
             task = self.app.task_manager.get_task(task_id)
             if task:
                 new_status = Status.DONE if task.status != Status.DONE else Status.TODO
+                # The tree redraws the task through the change notification
                 self.app.task_manager.update_task(task_id, status=new_status)
-                self.task_tree.reload() # Reload to update style
                 self.task_detail.update_content(self.app.task_manager.get_task(task_id))
 
 class AgendaScreen(Screen):
@@ -206,24 +368,24 @@ class AgendaScreen(Screen):
         """Populate the agenda table."""
         table = self.query_one(DataTable)
         table.add_columns("Due Date", "Priority", "Status", "Title")
-        tasks = self.app.task_manager.get_all_tasks_flat()
+        # Only open tasks with a due date, already in due-date order
+        tasks = self.app.task_manager.due_tasks()
         today = datetime.date.today()
         for task in tasks:
-            if task.due_date and task.status != Status.DONE:
-                row_style = ""
-                if task.due_date.date() < today:
-                    row_style = "red"
-                elif task.due_date.date() == today:
-                    row_style = "bold green"
-
-                table.add_row(
-                    task.due_date.strftime("%Y-%m-%d %H:%M"),
-                    task.priority.value,
-                    task.status.value,
-                    task.title,
-                    key=task.id,
-                    style=row_style
-                )
+            row_style = ""
+            if task.due_date.date() < today:
+                row_style = "red"
+            elif task.due_date.date() == today:
+                row_style = "bold green"
+
+            table.add_row(
+                _fmt_due(task.due_date),
+                task.priority.value,
+                task.status.value,
+                task.title,
+                key=task.id,
+                style=row_style
+            )
 
 class GraphScreen(Screen):
     """A screen to display the ASCII graph of task connections."""
@@ -232,15 +394,38 @@ class GraphScreen(Screen):
         yield VerticalScroll(Static(id="graph_view"))
         yield Footer()
 
-    def on_mount(self) -> None:
-        """Generate and display the graph."""
+    def on_screen_resume(self) -> None:
+        """Display the graph each time the screen is shown, regenerating it only if tasks changed."""
         graph_view = self.query_one("#graph_view")
-        tasks = list(self.app.task_manager.tasks.values())
+        task_manager = self.app.task_manager
+        cached = self.app._graph_cache
+        if cached and cached[0] == task_manager.version:
+            graph_view.update(Text(cached[1], justify="left"))
+            return
+        # Lay the graph out in a thread so the UI keeps responding meanwhile
+        graph_view.update("Generating graph...")
+        tasks = list(task_manager.tasks.values())
+        self.run_worker(
+            partial(self._build_graph, graph_view, tasks, task_manager.version), thread=True, exclusive=True
+        )
+
+    def _build_graph(self, graph_view: Static, tasks: list, version: int) -> None:
+        """Generate the graph on a worker thread and hand the result to the UI thread."""
         try:
             ascii_graph = generate_ascii_graph(tasks, width=200, height=50)
-            graph_view.update(Text(ascii_graph, justify="left"))
         except Exception as e:
-            graph_view.update(f"Could not generate graph: {e}")
+            self.app.call_from_thread(graph_view.update, f"Could not generate graph: {e}")
+            return
+        self.app.call_from_thread(self._show_graph, graph_view, version, ascii_graph)
+
+    def _show_graph(self, graph_view: Static, version: int, ascii_graph: str) -> None:
+        """Cache and display a finished graph; runs on the UI thread."""
+        cached = self.app._graph_cache
+        if cached and cached[0] > version:
+            # A graph of newer tasks has already been shown
+            return
+        self.app._graph_cache = (version, ascii_graph)
+        graph_view.update(Text(ascii_graph, justify="left"))
 
 # --- The Main App ---
 
@@ -263,9 +448,11 @@ class ProductivityApp(App):
 
     def __init__(self):
         super().__init__()
-        self.storage = JsonStorage("tasks.json")
+        self.storage = SqliteStorage("tasks.db", legacy_json="tasks.json")
         self.task_manager = TaskManager(self.storage)
         self.reminder_manager = ReminderManager(self.task_manager)
+        # (task_manager.version, ASCII graph) of the last graph shown
+        self._graph_cache = None
         self._create_dummy_css()
 
     def on_mount(self) -> None:
@@ -273,6 +460,11 @@ class ProductivityApp(App):
         self.push_screen("planner")
         self.set_interval(60, self.check_reminders)
 
+    def on_unmount(self) -> None:
+        """Write any pending task changes and close the database before the app exits."""
+        self.task_manager.flush()
+        self.storage.close()
+
     def check_reminders(self) -> None:
         """Callback to check for and show reminders."""
         due_tasks = self.reminder_manager.check_reminders()
@@ -291,8 +483,8 @@ class ProductivityApp(App):
 
     def _create_dummy_css(self):
         """Creates a default stylesheet if one doesn't exist."""
-        try:
-            with open(self.CSS_PATH, "x", encoding='utf-8') as f:
+        if not os.path.exists(self.CSS_PATH):
+            with open(self.CSS_PATH, "w", encoding='utf-8') as f:
                 f.write("""
 /* style.tcss - A simple stylesheet for the productivity app */
 Screen {
@@ -338,6 +530,4 @@ DataTable {
 #graph_view {
     padding: 1;
 }
-""")
-        except FileExistsError:
-            pass    
\ No newline at end of file
+""")
\ No newline at end of file
@@ -2,63 +2,18 @@
 import json
 from typing import Optional
 import re
-import html
 
-def generate_web_graph(task_manager, output_path="index.html", central_node_id: Optional[str] = None):
-    nodes, edges, task_ids = [], [], {task.id for task in task_manager.tasks.values()}
-    full_node_data = {}
-
-    for task in task_manager.tasks.values():
-        # --- NEW NODE STYLING ---
-        node = {
-            "id": task.id,
-            "label": task.title,
-            "shape": "dot",  # Use 'dot' for a circle
-            "size": 15,      # Default size for normal nodes
-            "font": {
-                "color": "#d3d3d3",
-                "strokeWidth": 0,
-                "align": "center"
-            },
-            "color": {
-                "border": "#61afef",
-                "background": "#61afef"
-            }
-        }
-
-        # --- SUN STYLING FOR CENTRAL NODE ---
-        if task.id == central_node_id:
-            node["size"] = 40  # Make the central node bigger
-            node["color"] = {
-                "border": "#E6DB74",  # Yellow
-                "background": "#E6DB74"
-            }
-            node["font"] = {"color": "#E6DB74", "size": 20}
-
-        nodes.append(node)
+_LINK_RE = re.compile(r'\[\[([a-f0-9\-]+)\]\]')
 
-        # Store all data for the sidebar
-        full_node_data[task.id] = {
-            "title": html.escape(task.title),
-            "author": html.escape(getattr(task, 'author', None) or 'N/A'),
-            "status": task.status.value,
-            "priority": task.priority.value,
-            "description": html.escape(task.description).replace('\n', '<br>'),
-        }
-
-        if task.parent_id and task.parent_id in task_ids:
-            edges.append({"from": task.id, "to": task.parent_id, "arrows": "to"})
-
-        link_pattern = re.compile(r'\[\[([a-f0-9\-]+)\]\]')
-        for target_id in link_pattern.findall(task.description):
-            if target_id in task_ids:
-                edges.append({"from": task.id, "to": target_id, "arrows": "to", "dashes": True})
+# html.escape() as str.translate() tables; descriptions also turn newlines into <br>
+_TEXT_TABLE = str.maketrans({'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#x27;'})
+_DESC_TABLE = str.maketrans({'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#x27;', '\n': '<br>'})
 
-    nodes_json = json.dumps(nodes, indent=2)
-    edges_json = json.dumps(edges, indent=2)
-    full_data_json = json.dumps(full_node_data, indent=2)
+# The data is only read by vis.js, so write it without any whitespace
+_JSON_SEPARATORS = (",", ":")
 
-    html_content = f"""
+# The page is written in pieces around the streamed JSON data
+_HTML_PROLOGUE = """
 <!DOCTYPE html>
 <html lang="en">
 <head>
@@ -66,49 +21,107 @@ def generate_web_graph(task_manager, output_path="index.html", central_node_id:
     <title>TermiPlan - Graph View</title>
     <script type="text/javascript" src="https://unpkg.com/vis-network/standalone/umd/vis-network.min.js"></script>
     <style>
-        body, html {{ margin: 0; padding: 0; width: 100%; height: 100%; background-color: #282c34; color: #abb2bf; font-family: monospace; overflow: hidden; }}
-        #graph-container {{ position: absolute; left: 0; top: 0; width: 70%; height: 100%; }}
-        #sidebar {{ position: absolute; right: 0; top: 0; width: 30%; height: 100%; background-color: #21252b; box-sizing: border-box; padding: 20px; overflow-y: auto; border-left: 2px solid #1c1e24; }}
-        h2 {{ color: #61afef; }} p {{ line-height: 1.6; }} b {{ color: #c678dd; }}
+        body, html { margin: 0; padding: 0; width: 100%; height: 100%; background-color: #282c34; color: #abb2bf; font-family: monospace; overflow: hidden; }
+        #graph-container { position: absolute; left: 0; top: 0; width: 70%; height: 100%; }
+        #sidebar { position: absolute; right: 0; top: 0; width: 30%; height: 100%; background-color: #21252b; box-sizing: border-box; padding: 20px; overflow-y: auto; border-left: 2px solid #1c1e24; }
+        h2 { color: #61afef; } p { line-height: 1.6; } b { color: #c678dd; }
     </style>
 </head>
 <body>
     <div id="graph-container"></div>
     <div id="sidebar"><h2>Select a Node</h2><p>Click on a task to see details.</p></div>
     <script>
-        const nodes = new vis.DataSet({nodes_json});
-        const edges = new vis.DataSet({edges_json});
-        const fullData = {full_data_json};
+        const nodes = new vis.DataSet("""
+_HTML_BEFORE_EDGES = """);
+        const edges = new vis.DataSet("""
+_HTML_BEFORE_FULL_DATA = """);
+        const fullData = """
+_HTML_EPILOGUE = """;
         const container = document.getElementById('graph-container');
         const sidebar = document.getElementById('sidebar');
-        const data = {{ nodes: nodes, edges: edges }};
-        const options = {{
-            edges: {{ color: '#5c6370' }},
-            physics: {{ solver: 'forceAtlas2Based' }}
-        }};
+        const data = { nodes: nodes, edges: edges };
+        // Node styling lives in groups, so each node only names its group
+        const options = {
+            groups: {
+                normal: {
+                    shape: 'dot',  // Use 'dot' for a circle
+                    size: 15,
+                    color: { border: '#61afef', background: '#61afef' },
+                    font: { color: '#d3d3d3', strokeWidth: 0, align: 'center' }
+                },
+                // Sun styling for the central node: bigger and yellow
+                central: {
+                    shape: 'dot',
+                    size: 40,
+                    color: { border: '#E6DB74', background: '#E6DB74' },
+                    font: { color: '#E6DB74', size: 20 }
+                }
+            },
+            edges: { color: '#5c6370' },
+            physics: { solver: 'forceAtlas2Based' }
+        };
         const network = new vis.Network(container, data, options);
 
-        network.on('click', function (params) {{
-            if (params.nodes.length > 0) {{
+        network.on('click', function (params) {
+            if (params.nodes.length > 0) {
                 const nodeId = params.nodes[0];
                 const nodeData = fullData[nodeId];
-                if (nodeData) {{
+                if (nodeData) {
                     sidebar.innerHTML = `
-                        <h2>${{nodeData.title}}</h2>
-                        <p><b>Author:</b> ${{nodeData.author}}</p>
-                        <p><b>Status:</b> ${{nodeData.status}}</p>
-                        <p><b>Priority:</b> ${{nodeData.priority}}</p>
+                        <h2>${nodeData.title}</h2>
+                        <p><b>Author:</b> ${nodeData.author}</p>
+                        <p><b>Status:</b> ${nodeData.status}</p>
+                        <p><b>Priority:</b> ${nodeData.priority}</p>
                         <hr>
-                        <p>${{nodeData.description}}</p>
+                        <p>${nodeData.description}</p>
                     `;
-                }}
-            }} else {{
+                }
+            } else {
                  sidebar.innerHTML = '<h2>Select a Node</h2><p>Click on a task to see details.</p>';
-            }}
-        }});
+            }
+        });
     </script>
 </body>
 </html>
     """
+
+def generate_web_graph(task_manager, output_path="index.html", central_node_id: Optional[str] = None):
+    # task_manager.tasks is keyed by ID, so it doubles as the set of known IDs
+    task_ids = task_manager.tasks
+    # There is one node per task, so size the list up front; the edge count isn't known
+    nodes, edges = [None] * len(task_ids), []
+    full_node_data = {}
+
+    for i, task in enumerate(task_manager.tasks.values()):
+        # --- NODE STYLING: set by the vis.js group named here ---
+        nodes[i] = {
+            "id": task.id,
+            "label": task.title,
+            "group": "central" if task.id == central_node_id else "normal",
+        }
+
+        # Store all data for the sidebar
+        full_node_data[task.id] = {
+            "title": task.title.translate(_TEXT_TABLE),
+            "author": (task.author or 'N/A').translate(_TEXT_TABLE),
+            "status": task.status.value,
+            "priority": task.priority.value,
+            "description": task.description.translate(_DESC_TABLE),
+        }
+
+        if task.parent_id and task.parent_id in task_ids:
+            edges.append({"from": task.id, "to": task.parent_id, "arrows": "to"})
+
+        for target_id in _LINK_RE.findall(task.description):
+            if target_id in task_ids:
+                edges.append({"from": task.id, "to": target_id, "arrows": "to", "dashes": True})
+
+    # Stream the page straight to disk instead of building it as one string
     with open(output_path, 'w', encoding='utf-8') as f:
-        f.write(html_content)
\ No newline at end of file
+        f.write(_HTML_PROLOGUE)
+        json.dump(nodes, f, separators=_JSON_SEPARATORS)
+        f.write(_HTML_BEFORE_EDGES)
+        json.dump(edges, f, separators=_JSON_SEPARATORS)
+        f.write(_HTML_BEFORE_FULL_DATA)
+        json.dump(full_node_data, f, separators=_JSON_SEPARATORS)
+        f.write(_HTML_EPILOGUE)
\ No newline at end of file